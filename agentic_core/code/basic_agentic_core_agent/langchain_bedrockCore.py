@@ -1,17 +1,31 @@
 import asyncio
+import sys
 import boto3
 from langchain_aws import ChatBedrock
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from bedrock_agentcore.runtime import BedrockAgentCoreApp
+from bedrock_agentcore.runtime import BedrockAgentCoreApp, PingStatus
 import json
+from pathlib import Path
+
+# 로컬 실행 시 shared 모듈 경로 추가 (Runtime 배포 시에는 엔트리포인트 디렉터리로 복사됨)
+SHARED_DIR = Path(__file__).resolve().parents[1] / "shared"
+if SHARED_DIR.exists():
+    sys.path.append(str(SHARED_DIR))
+from client_registry import ClientRegistry
+from runtime_lifecycle import RuntimeLifecycle
+from llm_streaming import astream_text, astream_events_text
+from stream_emitter import StreamEmitter
+
 app = BedrockAgentCoreApp()
+# 프로세스 공용 boto3 client
+registry = ClientRegistry()
 
 class AdvancedLLM:
     """고급 LLM 스트리밍 관리자"""
     
     def __init__(self):
-        self.region_name = boto3.Session().region_name
+        self.region_name = registry.region_name
         self.model_id = None
         self.bedrock_client = self._setup_bedrock_client()
         self.llm = self._setup_llm()
@@ -19,10 +33,7 @@ class AdvancedLLM:
     def _setup_bedrock_client(self):
         """Bedrock 클라이언트 설정"""
         try:
-            return boto3.client(
-                service_name='bedrock-runtime',
-                region_name=self.region_name
-            )
+            return registry.client('bedrock-runtime', self.region_name)
         except Exception as e:
             print(f"❌ Bedrock 클라이언트 초기화 실패: {e}")
             return None
@@ -47,20 +58,37 @@ class AdvancedLLM:
             print(f"❌ LLM 초기화 실패: {e}")
             return None
 
-# 전역 변수
-agent = None
+# 앱 시작 시 warmup, 첫 요청과 겹쳐도 한 번만 초기화
+lifecycle = RuntimeLifecycle()
+llm_resource = lifecycle.resource("llm", AdvancedLLM)
+# LLM 생성 후 Bedrock TLS connection 미리 열기
+lifecycle.on_warmup(registry.warmup)
+
+
+@app.ping
+def ping_status():
+    """warmup 진행 중에는 HealthyBusy 보고"""
+    return PingStatus.HEALTHY_BUSY if lifecycle.warming else PingStatus.HEALTHY
+
 
 @app.entrypoint
 async def extract_text(payload):
     """텍스트 추출 AgentCore Runtime 엔트리포인트"""
-    global agent
-    
-    if agent is None:
+    if not llm_resource.ready:
         yield {"type": "status", "message": "🚀 LLM 초기화 중..."}
-        agent = AdvancedLLM()
+    agent = await llm_resource.aget()
     
     # payload에서 입력 데이터 추출
     user_input = payload.get("input_data", "태양의 온도에 대해 말해줘")
+    # 스트리밍 경로: direct (LLM.astream 직접 구동) | events (chain.astream_events)
+    stream_mode = payload.get("stream_mode", "direct")
+    # 응답 frame 병합: frame_bytes 크기 또는 flush_ms 간격마다 전송, final_content=False면 final에 메타데이터만 포함
+    emitter = StreamEmitter(
+        max_bytes=payload.get("frame_bytes", 512),
+        flush_interval=payload.get("flush_ms", 50) / 1000,
+        final_content=payload.get("final_content", True)
+    )
+    usage = {}
     
     # 체인 구성
     prompt = ChatPromptTemplate.from_messages([
@@ -72,35 +100,26 @@ async def extract_text(payload):
     
     yield {"type": "status", "message": "🔥 응답 생성 중..."}
     
-    collected_text = []
     try:
-        async for event in chain.astream_events({}):
-            if event["event"] == "on_chat_model_stream":
-                chunk = event["data"]["chunk"]
-                if hasattr(chunk, 'content') and chunk.content:
-                    if isinstance(chunk.content, str):
-                        collected_text.append(chunk.content)
-                        yield {"type": "stream", "content": chunk.content}
-                    elif isinstance(chunk.content, list):
-                        for content_item in chunk.content:
-                            if isinstance(content_item, dict):
-                                if text := content_item.get('text'):
-                                    collected_text.append(text)
-                                    yield {"type": "stream", "content": text}
-                            elif isinstance(content_item, str):
-                                collected_text.append(content_item)
-                                yield {"type": "stream", "content": content_item}
+        if stream_mode == "events":
+            deltas = astream_events_text(chain, {})
+        else:
+            deltas = astream_text(agent.llm, await prompt.ainvoke({}), usage=usage)
+        async for frame in emitter.frames(deltas):
+            yield frame
                                 
     except Exception as e:
+        if frame := emitter.flush():
+            yield frame
         yield {"type": "error", "message": f"❌ 스트리밍 실패: {e}"}
         
 
     
     # 최종 결과
-    final_text = "".join(collected_text)
-    yield {"type": "final", "content": final_text}
+    yield emitter.final(usage)
 
 if __name__ == "__main__":
+    lifecycle.warmup()
     app.run()
 
 
@@ -1,4 +1,4 @@
-from bedrock_agentcore.runtime import BedrockAgentCoreApp
+from bedrock_agentcore.runtime import BedrockAgentCoreApp, PingStatus
 import boto3
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
@@ -30,33 +30,52 @@ from langchain_core.retrievers import BaseRetriever
 from langchain_core.documents import Document
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from langchain_core.chat_history import BaseChatMessageHistory
+from pathlib import Path
+
+# 로컬 실행 시 shared 모듈 경로 추가 (Runtime 배포 시에는 엔트리포인트 디렉터리로 복사됨)
+SHARED_DIR = Path(__file__).resolve().parents[1] / "shared"
+if SHARED_DIR.exists():
+    sys.path.append(str(SHARED_DIR))
+from client_registry import ClientRegistry
+from config_cache import ConfigCache
+from runtime_lifecycle import RuntimeLifecycle
+from llm_streaming import astream_text, astream_events_text
+from stream_emitter import StreamEmitter
 
 
 
 
 app = BedrockAgentCoreApp()
+# 프로세스 공용 boto3 client / resource
+registry = ClientRegistry()
+# Secrets Manager 조회 결과 캐시 (background 재조회)
+config_cache = ConfigCache(registry)
+DYNAMODB_SECRET_ID = 'dynamodb-credentials'
 
 
 def get_dynamodb_credentials():
-    """Get DynamoDB credentials from AWS Secrets Manager"""
-    
-    # Initialize Secrets Manager client
-    secrets_client = boto3.client('secretsmanager')
+    """Get DynamoDB credentials from AWS Secrets Manager (cached, refreshed in background)"""
     
     try:
-        # Get the secret value
-        response = secrets_client.get_secret_value(SecretId='dynamodb-credentials')
-        
-        # Parse the JSON string
-        secret_data = json.loads(response['SecretString'])
-        
-        return secret_data
+        return config_cache.secret(DYNAMODB_SECRET_ID)
         
     except Exception as e:
         print(f"Error retrieving secret: {e}")
         raise
 
 
+def refresh_credentials_on_error(error):
+    """테이블 접근 권한 / 테이블 없음 오류 시 secret 재조회 요청 (rotation / 테이블 교체 반영)
+
+    재조회는 config_cache의 background thread가 수행하므로 요청 경로를 막지 않습니다.
+    """
+    if not isinstance(error, ClientError):
+        return
+    if error.response.get("Error", {}).get("Code") in ("AccessDeniedException", "ResourceNotFoundException",
+                                                         "UnrecognizedClientException"):
+        config_cache.request_secret_refresh(DYNAMODB_SECRET_ID)
+
+
 
 class AdvancedLLM:
     """고급 LLM 스트리밍 관리자"""
@@ -70,10 +89,7 @@ class AdvancedLLM:
     def _setup_bedrock_client(self):
         """Bedrock 클라이언트 설정"""
         try:
-            return boto3.client(
-                service_name='bedrock-runtime',
-                region_name=self.region_name
-            )
+            return registry.client('bedrock-runtime', self.region_name)
         except Exception as e:
             print(f"❌ Bedrock 클라이언트 초기화 실패: {e}")
             return None
@@ -103,7 +119,7 @@ class DynamoDBHistory(BaseChatMessageHistory):
     def __init__(self, session_id: str, table_name: str = "conversations-table"):
         self.session_id = session_id
         self.table_name = table_name
-        self.dynamodb = boto3.resource('dynamodb')
+        self.dynamodb = registry.resource('dynamodb')
         self.table = self.dynamodb.Table(table_name)
     
     @property
@@ -126,6 +142,7 @@ class DynamoDBHistory(BaseChatMessageHistory):
             return messages
         except Exception as e:
             print(f"메시지 로드 실패: {e}")
+            refresh_credentials_on_error(e)
             return []
     
     def add_message(self, message: BaseMessage) -> None:
@@ -176,25 +193,45 @@ region = credentials['region']
 table_arn = credentials['table_arn']
 
 # Use in DynamoDB client
-dynamodb = boto3.resource('dynamodb', region_name=region)
+dynamodb = registry.resource('dynamodb', region)
 table = dynamodb.Table(table_name)
 
-# 전역 변수
-agent = None
+# 앱 시작 시 warmup, 첫 요청과 겹쳐도 한 번만 초기화
+lifecycle = RuntimeLifecycle()
+llm_resource = lifecycle.resource("llm", AdvancedLLM)
+# LLM 생성 후 Bedrock TLS connection 미리 열기
+lifecycle.on_warmup(registry.warmup)
+
+
+@app.ping
+def ping_status():
+    """warmup 진행 중에는 HealthyBusy 보고"""
+    return PingStatus.HEALTHY_BUSY if lifecycle.warming else PingStatus.HEALTHY
+
 
 @app.entrypoint
 async def extract_text(payload):
     """텍스트 추출 AgentCore Runtime 엔트리포인트"""
-    global agent
     global table_name
     
-    if agent is None:
+    if not llm_resource.ready:
         yield {"type": "status", "message": "🚀 LLM 초기화 중..."}
-        agent = AdvancedLLM()
+    agent = await llm_resource.aget()
     
     # payload에서 입력 데이터 추출
     user_input = payload.get("input_data", "태양의 온도에 대해 말해줘")
     session_id = payload.get("seesion_id", "test-session")  # Fixed typo
+    # 캐시된 secret 기준 테이블 (background 재조회 반영)
+    table_name = get_dynamodb_credentials()['table_name']
+    # 스트리밍 경로: direct (history 직접 조회/저장 + LLM.astream) | events (RunnableWithMessageHistory.astream_events)
+    stream_mode = payload.get("stream_mode", "direct")
+    # 응답 frame 병합: frame_bytes 크기 또는 flush_ms 간격마다 전송, final_content=False면 final에 메타데이터만 포함
+    emitter = StreamEmitter(
+        max_bytes=payload.get("frame_bytes", 512),
+        flush_interval=payload.get("flush_ms", 50) / 1000,
+        final_content=payload.get("final_content", True)
+    )
+    usage = {}
 
     # 체인 구성
     template_dynamo = """The following is a friendly conversation between a human and an AI. 
@@ -225,26 +262,37 @@ async def extract_text(payload):
     
     yield {"type": "status", "message": "🔥 응답 생성 중..."}
     
-    collected_text = []
     try:
-        # Use chain_dynamo and pass proper input
-        async for event in chain_dynamo.astream_events(
-            {"question": user_input},
-            config={"configurable": {"session_id": session_id}}
-        ):
-            if event["event"] == "on_chat_model_stream":
-                chunk = event["data"]["chunk"]
-                if hasattr(chunk, 'content') and chunk.content:
-                    if isinstance(chunk.content, str):
-                        collected_text.append(chunk.content)
-                        yield {"type": "stream", "content": chunk.content}
+        if stream_mode == "events":
+            # Use chain_dynamo and pass proper input
+            deltas = astream_events_text(
+                chain_dynamo,
+                {"question": user_input},
+                config={"configurable": {"session_id": session_id}}
+            )
+        else:
+            history = DynamoDBHistory(session_id, table_name)
+            chat_history = await asyncio.to_thread(lambda: history.messages)
+            prompt_value = await prompt_dynamo.ainvoke({"chat_history": chat_history, "question": user_input})
+            deltas = astream_text(agent.llm, prompt_value, usage=usage)
+        async for frame in emitter.frames(deltas):
+            yield frame
+
+        if stream_mode != "events":
+            # RunnableWithMessageHistory와 같이 질문 / 답변을 history에 저장
+            await asyncio.to_thread(
+                history.add_messages,
+                [HumanMessage(content=user_input), AIMessage(content=emitter.text)]
+            )
                                 
     except Exception as e:
+        refresh_credentials_on_error(e)
+        if frame := emitter.flush():
+            yield frame
         yield {"type": "error", "message": f"❌ 스트리밍 실패: {e}"}
     
     # 최종 결과
-    final_text = "".join(collected_text)
-    yield {"type": "final", "content": final_text}
+    yield emitter.final(usage)
 
 async def test():
     # Test payload
@@ -264,10 +312,11 @@ async def test():
         elif result["type"] == "error":
             print(f"\n❌ {result['message']}")
         elif result["type"] == "final":
-            print(f"\n\n✅ Final result: {len(result['content'])} characters")
+            print(f"\n\n✅ Final result: {result.get('length', len(result.get('content', '')))} characters")
 
 if __name__ == "__main__":
     # asyncio.run(test())
+    lifecycle.warmup()
     app.run()
     
 
@@ -11,6 +11,7 @@ from botocore.credentials import Credentials
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 from datetime import timedelta
+from pathlib import Path
 from typing import Generator, Any
 import httpx
 from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
@@ -18,12 +19,29 @@ from mcp.client.streamable_http import GetSessionIdCallback, StreamableHTTPTrans
 from mcp.shared._httpx_utils import McpHttpClientFactory, create_mcp_http_client
 from mcp.shared.message import SessionMessage
 from langchain_aws import ChatBedrock
+from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 import json
 
+# 로컬 실행 시 shared 모듈 경로 추가 (Runtime 배포 시에는 엔트리포인트 디렉터리로 복사됨)
+SHARED_DIR = Path(__file__).resolve().parents[1] / "shared"
+if SHARED_DIR.exists():
+    sys.path.append(str(SHARED_DIR))
+from client_registry import ClientRegistry
+from config_cache import ConfigCache
+from llm_streaming import chunk_text
+from stream_emitter import StreamEmitter
+from mcp_session_pool import McpSessionPool, CONNECTION_ERRORS
+
 app = BedrockAgentCoreApp()
+# 프로세스 공용 boto3 client / ChatBedrock
+registry = ClientRegistry()
+# SSM parameter 조회 결과 캐시 (background 재조회)
+config_cache = ConfigCache(registry)
+MCP_AGENT_ARN_PARAMETER = "/mcp_server/runtime_iam/agent_arn"
+MCP_MODEL_ID = "anthropic.claude-3-sonnet-20240229-v1:0"
 
 class SigV4HTTPXAuth(httpx.Auth):
     def __init__(self, credentials: Credentials, service: str, region: str):
@@ -78,8 +96,7 @@ async def streamablehttp_client_with_sigv4(
         yield result
 
 def create_streamable_http_transport_sigv4(mcp_url: str, service_name: str, region: str):
-    session = boto3.Session()
-    credentials = session.get_credentials()
+    credentials = registry.session.get_credentials()
     return streamablehttp_client_with_sigv4(
         url=mcp_url,
         credentials=credentials,
@@ -87,89 +104,90 @@ def create_streamable_http_transport_sigv4(mcp_url: str, service_name: str, regi
         region=region,
     )
 
-async def llm_mcp_handler(mcp_session, region, query):
+# MCP 서버 URL별 장기 세션 (연결 / initialize / list_tools는 세션 생성 시 한 번만 수행)
+mcp_pool = McpSessionPool(
+    lambda url: create_streamable_http_transport_sigv4(
+        mcp_url=url, service_name="bedrock-agentcore", region=registry.region_name
+    ),
+    max_concurrency=8
+)
+
+def should_refresh_agent_arn(error):
+    """MCP 연결 / 인증 오류인지 확인 (anyio task group의 ExceptionGroup 포함)
+
+    404는 Runtime 재배포로 agent ARN이 바뀐 경우입니다.
+    """
+    nested = getattr(error, "exceptions", None)
+    if nested:
+        return any(should_refresh_agent_arn(e) for e in nested)
+    if isinstance(error, CONNECTION_ERRORS):
+        return True
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) in (401, 403, 404)
+
+def mcp_tools_to_bedrock(tools_list):
+    """MCP list_tools 결과를 Bedrock(Claude) tool 스키마로 변환"""
+    return [
+        {
+            "name": tool_info.name,
+            "description": tool_info.description or tool_info.name,
+            "input_schema": tool_info.inputSchema or {"type": "object", "properties": {}}
+        }
+        for tool_info in tools_list
+    ]
+
+def tool_result_text(tool_result):
+    """CallToolResult content에서 텍스트 추출"""
+    contents = getattr(tool_result, "content", None)
+    if not contents:
+        return str(tool_result)
+    return "\n".join(getattr(content, "text", None) or str(content) for content in contents)
+
+async def llm_mcp_handler(mcp_session, region, query, tools_list=None):
+    """MCP 도구를 native tool로 바인딩하여 한 번의 스트리밍 호출로 답변 또는 도구 실행 (텍스트 delta 반환)"""
     try:
-        # MCP 도구 정보 가져오기
-        mcp_tools = await mcp_session.list_tools()
-        tools_list = mcp_tools.tools if hasattr(mcp_tools, 'tools') else mcp_tools
-        
-        # LLM 초기화
-        bedrock_client = boto3.client('bedrock-runtime', region_name=region)
-        llm = ChatBedrock(
-            client=bedrock_client,
-            model_id="anthropic.claude-3-sonnet-20240229-v1:0",
-            model_kwargs={"max_tokens": 1000, "temperature": 0}
-        )
-        
-        # 도구 정보를 스키마와 함께 텍스트로 변환
-        tool_descriptions = []
-        for tool_info in tools_list:
-            schema = tool_info.inputSchema
-            required_params = schema.get('required', [])
-            properties = schema.get('properties', {})
-            
-            param_info = []
-            for param in required_params:
-                param_type = properties.get(param, {}).get('type', 'unknown')
-                param_info.append(f"{param} ({param_type})")
-            
-            tool_descriptions.append(
-                f"- {tool_info.name}: {tool_info.description}\n"
-                f"  필수 파라미터: {', '.join(param_info)}"
+        # MCP 도구 정보 가져오기 (풀 세션은 연결 시 조회한 목록 사용)
+        if tools_list is None:
+            mcp_tools = await mcp_session.list_tools()
+            tools_list = mcp_tools.tools if hasattr(mcp_tools, 'tools') else mcp_tools
+        
+        # LLM (region별로 한 번만 생성하여 재사용)
+        llm = registry.get(
+            ("chat", MCP_MODEL_ID, region),
+            lambda: ChatBedrock(
+                client=registry.client('bedrock-runtime', region),
+                model_id=MCP_MODEL_ID,
+                model_kwargs={"max_tokens": 1000, "temperature": 0}
             )
-        
-        tools_text = "\n".join(tool_descriptions)
-        
-        # 개선된 도구 선택 프롬프트
-        selection_prompt = f"""
-        사용 가능한 도구들:
-        {tools_text}
-        
-        질문: {query}
-        
-        이 질문을 분석하세요:
-        1. 수학 계산이 필요한가? → add_numbers 또는 multiply_numbers 사용
-        2. 사용자 인사가 필요한가? → greet_user 사용  
-        3. 위 도구들로 해결할 수 없는 일반적인 질문인가? → "none" 선택
-        
-        응답 형식:
-        {{
-            "tool": "도구명 또는 none",
-            "params": {{"파라미터": 값}} 또는 {{}}
-        }}
-        
-        JSON만 응답하세요:
-        """
-        
-        # LLM으로 도구 선택 및 파라미터 생성
-        response = await llm.ainvoke(selection_prompt)
-        
-        try:
-            import json
-            decision = json.loads(response.content.strip())
-            
-            tool_name = decision.get("tool")
-            params = decision.get("params", {})
-            
-            print(f"Selected tool: {tool_name}, params: {params}")
-            
-            if tool_name and tool_name.lower() != "none":
-                # MCP 도구 실행
-                tool_result = await mcp_session.call_tool(tool_name, params)
-                return f"🔧 도구 '{tool_name}' 결과: {tool_result}"
-            else:
-                # 도구 없이 직접 답변
-                direct_response = await llm.ainvoke(f"질문에 답하세요: {query}")
-                return f"🤖 직접 답변: {direct_response.content}"
-                
-        except (json.JSONDecodeError, KeyError) as e:
-            print(f"JSON 파싱 오류: {e}")
-            # JSON 파싱 실패 시 직접 답변
-            direct_response = await llm.ainvoke(f"질문에 답하세요: {query}")
-            return f"🤖 직접 답변: {direct_response.content}"
-        
+        )
+        llm_with_tools = llm.bind_tools(mcp_tools_to_bedrock(tools_list))
+        
+        messages = [
+            SystemMessage(content=(
+                "필요한 경우에만 제공된 도구를 사용하세요. "
+                "도구로 해결할 수 없는 일반적인 질문은 도구 없이 바로 답하세요."
+            )),
+            HumanMessage(content=query)
+        ]
+        
+        # 답변 텍스트는 바로 스트리밍, tool_use 블록은 chunk를 합쳐 tool_calls로 복원
+        gathered = None
+        async for chunk in llm_with_tools.astream(messages):
+            gathered = chunk if gathered is None else gathered + chunk
+            if text := chunk_text(chunk):
+                yield text
+        
+        for tool_call in (gathered.tool_calls if gathered is not None else []):
+            print(f"Selected tool: {tool_call['name']}, params: {tool_call['args']}")
+            # MCP 도구 실행
+            tool_result = await mcp_session.call_tool(tool_call["name"], tool_call["args"])
+            yield f"\n🔧 도구 '{tool_call['name']}' 결과: {tool_result_text(tool_result)}"
+        
+    except CONNECTION_ERRORS:
+        # 세션 풀이 세션을 폐기하고 재연결하도록 전달
+        raise
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        yield f"❌ Error: {str(e)}"
 
 
 
@@ -177,39 +195,35 @@ async def llm_mcp_handler(mcp_session, region, query):
 async def extract_text(payload):
     try:
         yield {"type": "status", "message": "🚀 Initializing LLM..."}
+        emitter = StreamEmitter(
+            max_bytes=payload.get("frame_bytes", 512),
+            flush_interval=payload.get("flush_ms", 50) / 1000,
+            final_content=payload.get("final_content", True)
+        )
         
-        boto_session = Session()
-        region = boto_session.region_name or 'us-west-2'
-        ssm_client = boto3.client("ssm", region_name=region)
-        
-        agent_arn_response = ssm_client.get_parameter(Name="/mcp_server/runtime_iam/agent_arn")
-        agent_arn = agent_arn_response["Parameter"]["Value"]
+        region = registry.region_name
+        agent_arn = config_cache.parameter(MCP_AGENT_ARN_PARAMETER)
         
         encoded_arn = agent_arn.replace(":", "%3A").replace("/", "%2F")
         mcp_url = f"https://bedrock-agentcore.{region}.amazonaws.com/runtimes/{encoded_arn}/invocations?qualifier=DEFAULT"
         
         yield {"type": "status", "message": "✅ Connecting to MCP..."}
         
-        stderr_backup = sys.stderr
-        sys.stderr = open(os.devnull, 'w')
-        
-        try:
-            async with create_streamable_http_transport_sigv4(
-                mcp_url=mcp_url, service_name="bedrock-agentcore", region=region
-            ) as (read_stream, write_stream, _):
-                async with ClientSession(read_stream, write_stream) as mcp_session:
-                    await mcp_session.initialize()
-                    
-                    yield {"type": "status", "message": "✅ Processing..."}
-                    
-                    response = await llm_mcp_handler(mcp_session, region, payload["input_data"])
-                    yield {"type": "stream", "content": response}
-        finally:
-            sys.stderr.close()
-            sys.stderr = stderr_backup
+        async with mcp_pool.session(mcp_url) as pooled:
+            yield {"type": "status", "message": "✅ Processing..."}
+            
+            deltas = llm_mcp_handler(pooled.session, region, payload["input_data"], pooled.tools)
+            async for frame in emitter.frames(deltas):
+                yield frame
+            yield emitter.final()
                 
     except Exception as e:
+        # 연결 / 인증 실패면 Runtime 재배포 등으로 agent ARN이 바뀌었을 수 있으므로 background 재조회 요청
+        if should_refresh_agent_arn(e):
+            config_cache.request_parameter_refresh(MCP_AGENT_ARN_PARAMETER)
         yield {"type": "error", "message": str(e)}
 
 if __name__ == "__main__":
+    # 첫 요청 전에 Bedrock TLS connection 미리 열기
+    registry.warmup()
     app.run()
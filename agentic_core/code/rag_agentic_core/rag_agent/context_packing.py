@@ -0,0 +1,107 @@
+"""
+context_packing.py
+검색 결과를 프롬프트 context로 조립
+
+- score cutoff 미만 chunk 제외
+- 같은 원문에서 이어지는 chunk(parent 동일 또는 연속 char chunk)를 병합하고 overlap 중복 텍스트 제거
+- 병합된 passage를 점수 순으로 token budget 안에 채움
+"""
+
+import math
+
+# offset 없이 텍스트로 overlap을 찾을 때 우연한 일치를 피하기 위한 최소 길이
+MIN_TEXT_OVERLAP = 20
+
+
+def estimate_tokens(text):
+    """tokenizer 없이 token 수 근사 (ASCII 4자 / 그 외 문자 1.5자당 1 token)"""
+    ascii_chars = sum(1 for c in text if c.isascii())
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 1.5)
+
+
+class ContextPacker:
+    """검색 chunk 병합 및 token budget 기반 context 조립"""
+
+    def __init__(self, token_budget=3000, min_score=None, max_overlap=200, min_passage_tokens=50):
+        self.token_budget = token_budget
+        self.min_score = min_score
+        self.max_overlap = max_overlap
+        self.min_passage_tokens = min_passage_tokens
+
+    def pack(self, chunks):
+        """chunk dict 목록(chunk_id, parent_chunk_id, content, start/end_char_idx, score)을 passage 목록으로 조립
+
+        Returns:
+            list: [{"chunk_ids", "text", "score", "tokens"}] (점수 순, token budget 이내)
+        """
+        if self.min_score is not None:
+            chunks = [chunk for chunk in chunks if chunk["score"] >= self.min_score]
+        passages = self._merge(chunks)
+        passages.sort(key=lambda passage: passage["score"], reverse=True)
+
+        packed, remaining = [], self.token_budget
+        for passage in passages:
+            tokens = estimate_tokens(passage["text"])
+            if tokens > remaining:
+                # 남은 budget이 충분하면 잘라서 포함, 아니면 제외
+                if remaining < self.min_passage_tokens:
+                    continue
+                passage["text"] = passage["text"][:int(len(passage["text"]) * remaining / tokens)]
+                tokens = estimate_tokens(passage["text"])
+            passage["tokens"] = tokens
+            packed.append(passage)
+            remaining -= tokens
+        return packed
+
+    def render(self, passages):
+        """passage 목록을 프롬프트용 텍스트로 변환"""
+        return "\n\n".join(
+            f"[{i}] (chunk {', '.join(map(str, passage['chunk_ids']))})\n{passage['text']}"
+            for i, passage in enumerate(passages, start=1)
+        )
+
+    def _merge(self, chunks):
+        """chunk_id 순으로 정렬 후 이어지는 chunk를 하나의 passage로 병합"""
+        unique = {}
+        for chunk in chunks:
+            if chunk["chunk_id"] not in unique or chunk["score"] > unique[chunk["chunk_id"]]["score"]:
+                unique[chunk["chunk_id"]] = chunk
+
+        passages, previous, seen_texts = [], None, set()
+        for chunk in sorted(unique.values(), key=lambda chunk: chunk["chunk_id"]):
+            text = chunk["content"]
+            if text in seen_texts:
+                continue
+            seen_texts.add(text)
+            if previous is not None and self._continues(previous, chunk):
+                passage = passages[-1]
+                passage["text"] += text[self._overlap(previous, chunk):]
+                passage["chunk_ids"].append(chunk["chunk_id"])
+                passage["score"] = max(passage["score"], chunk["score"])
+            else:
+                passages.append({"chunk_ids": [chunk["chunk_id"]], "text": text, "score": chunk["score"]})
+            previous = chunk
+        return passages
+
+    @staticmethod
+    def _continues(previous, chunk):
+        """같은 원문 구간의 이어지는 chunk인지 여부"""
+        if chunk.get("parent_chunk_id") is not None and chunk.get("parent_chunk_id") == previous.get("parent_chunk_id"):
+            return True
+        # 긴 문단을 나눈 char chunk는 연속된 chunk_id, 0보다 큰 start_char_idx를 가짐
+        start, end = chunk.get("start_char_idx"), previous.get("end_char_idx")
+        return (chunk["chunk_id"] == previous["chunk_id"] + 1 and bool(start)
+                and end is not None and start <= end)
+
+    def _overlap(self, previous, chunk):
+        """앞 chunk 끝과 겹치는 길이 (offset 우선, 텍스트가 일치하지 않으면 직접 탐색)"""
+        prev_text, text = previous["content"], chunk["content"]
+        start, end = chunk.get("start_char_idx"), previous.get("end_char_idx")
+        if start is not None and end is not None:
+            size = end - start
+            if 0 < size <= len(text) and prev_text.endswith(text[:size]):
+                return size
+        for size in range(min(self.max_overlap, len(prev_text), len(text)), MIN_TEXT_OVERLAP - 1, -1):
+            if prev_text.endswith(text[:size]):
+                return size
+        return 0
@@ -0,0 +1,46 @@
+"""
+diversity.py
+검색 결과 다양화 (Maximal Marginal Relevance)
+
+- 후보 벡터를 한 번에 정규화하여 질의 / 후보 간 cosine 유사도를 행렬 연산으로 계산
+- 선택된 문서와의 최대 유사도를 누적 갱신하여 k번 반복 (O(k·n))
+"""
+
+import numpy as np
+
+
+def cosine_similarity_matrix(a, b):
+    """행 벡터 간 cosine 유사도 행렬"""
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    a = a / np.maximum(np.linalg.norm(a, axis=-1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=-1, keepdims=True), 1e-12)
+    return a @ b.T
+
+
+def mmr_select(query_vector, candidate_vectors, k, lambda_mult=0.5):
+    """MMR로 k개 후보 index 선택 (선택 순서대로 반환)
+
+    score = lambda_mult * sim(query, d) - (1 - lambda_mult) * max sim(d, selected)
+    lambda_mult=1이면 관련도 순, 0에 가까울수록 다양성 우선입니다.
+    """
+    candidate_vectors = np.asarray(candidate_vectors, dtype=np.float32)
+    n = len(candidate_vectors)
+    k = min(k, n)
+    if k == 0:
+        return []
+    relevance = cosine_similarity_matrix(np.asarray(query_vector)[np.newaxis, :], candidate_vectors)[0]
+    pairwise = cosine_similarity_matrix(candidate_vectors, candidate_vectors)
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = pairwise[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, pairwise[best], out=max_similarity)
+    return selected
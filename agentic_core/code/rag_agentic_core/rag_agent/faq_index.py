@@ -0,0 +1,66 @@
+"""
+faq_index.py
+chunk별 expected_questions 기반 FAQ 질문 인덱스
+
+- 색인 시 expected_questions 임베딩 (정규화 float32) 을 questions.npy로 저장
+- 질문 → 소유 chunk 문서 id, 선택적으로 미리 생성한 답변을 faq.json에 저장
+- Runtime에서 질의 임베딩과 행렬 곱 한 번으로 가장 유사한 예상 질문 탐색
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+
+class FaqIndex:
+    """예상 질문 임베딩 인덱스"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.vectors = np.load(self.path / "questions.npy")
+        with open(self.path / "faq.json", 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        self.embedding_profile = saved.get("embedding_profile")
+        self.entries = saved["entries"]
+
+    @classmethod
+    def build(cls, path, chunks, embed_fn, embedding_profile=None, answer_fn=None):
+        """chunk 목록의 expected_questions로 인덱스 생성 후 저장
+
+        Args:
+            path: 저장 디렉터리
+            chunks: char_chunks 형식의 chunk iterable
+            embed_fn: 텍스트 목록 → 임베딩 목록 (Runtime 질의 임베딩과 같은 프로필)
+            embedding_profile: 임베딩 프로필 이름 (Runtime에서 불일치 시 사용 안 함)
+            answer_fn: (question, chunk) → 미리 생성한 답변 (None이면 chunk로만 연결)
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for chunk in chunks:
+            for question in chunk.get("expected_questions", []):
+                entry = {"question": question, "chunk_id": chunk["chunk_id"], "doc_id": f"aws_doc_{chunk['chunk_id']}"}
+                if answer_fn is not None:
+                    entry["answer"] = answer_fn(question, chunk)
+                entries.append(entry)
+
+        vectors = np.asarray(embed_fn([entry["question"] for entry in entries]), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.save(path / "questions.npy", vectors / np.where(norms == 0, 1, norms))
+        with open(path / "faq.json", 'w', encoding='utf-8') as f:
+            json.dump({"embedding_profile": embedding_profile, "entries": entries}, f, ensure_ascii=False)
+        print(f"✅ FAQ 인덱스 생성: 질문 {len(entries)}개 → {path}")
+        return cls(path)
+
+    def match(self, query_vector, threshold=0.9):
+        """가장 유사한 예상 질문 entry와 유사도 반환 (threshold 미만이면 None)"""
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0 or query.shape[0] != self.vectors.shape[1]:
+            return None
+        similarities = self.vectors @ (query / norm)
+        best = int(np.argmax(similarities))
+        if similarities[best] < threshold:
+            return None
+        return {**self.entries[best], "similarity": float(similarities[best])}
@@ -0,0 +1,151 @@
+"""
+local_vector_index.py
+NumPy 기반 로컬 벡터 인덱스 (OpenSearch 대체용)
+
+- vectors.npy (float32, 정규화) 를 memory-map으로 로드
+- 행렬 곱 기반 brute-force top-k 검색
+- 선택적으로 IVF(k-means 군집) 근사 인덱스 사용
+- OpenSearchEmbeddingProcessor.vector_search와 동일한 {"id", "score", 필드} 결과 형식
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+
+class LocalVectorIndex:
+    """memory-mapped 로컬 벡터 인덱스"""
+
+    def __init__(self, path, embed_fn=None, mmap=True, fields=None):
+        self.path = Path(path)
+        self.embed_fn = embed_fn
+        # 검색 결과에 포함할 필드 (None이면 전체)
+        self.fields = fields
+        self.vectors = np.load(self.path / "vectors.npy", mmap_mode="r" if mmap else None)
+        with open(self.path / "sources.json", 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        self.ids = saved["ids"]
+        self.sources = saved["sources"]
+        self.row_by_id = {doc_id: i for i, doc_id in enumerate(self.ids)}
+
+        # IVF 근사 인덱스 (build_ivf 실행 시 생성)
+        self.centroids = None
+        self.lists = None
+        if (self.path / "ivf_centroids.npy").exists():
+            self.centroids = np.load(self.path / "ivf_centroids.npy")
+            assignments = np.load(self.path / "ivf_assignments.npy")
+            self.lists = [np.flatnonzero(assignments == i) for i in range(len(self.centroids))]
+
+    @classmethod
+    def from_documents(cls, path, documents, field="content_embedding", embed_fn=None):
+        """(pk, document) iterable로 인덱스 생성 후 저장"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        ids, sources, vectors = [], [], []
+        for pk, document in documents:
+            ids.append(f"aws_doc_{pk}")
+            sources.append({key: value for key, value in document.items() if not key.endswith("_embedding")})
+            vectors.append(document[field])
+
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+        np.save(path / "vectors.npy", matrix)
+        with open(path / "sources.json", 'w', encoding='utf-8') as f:
+            json.dump({"field": field, "ids": ids, "sources": sources}, f, ensure_ascii=False)
+        print(f"✅ 로컬 인덱스 생성: {len(ids)}건 → {path}")
+        return cls(path, embed_fn)
+
+    def vector_by_id(self, doc_id):
+        """문서 id의 (정규화된) 벡터, 없으면 None"""
+        row = self.row_by_id.get(doc_id)
+        return None if row is None else np.asarray(self.vectors[row])
+
+    def build_ivf(self, n_lists=None, n_iter=10, seed=0):
+        """k-means 군집으로 IVF 근사 인덱스 생성 및 저장"""
+        n = len(self.ids)
+        n_lists = n_lists or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        vectors = np.asarray(self.vectors)
+        centroids = vectors[rng.choice(n, size=n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            for i in range(n_lists):
+                members = vectors[assignments == i]
+                if len(members):
+                    centroids[i] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+
+        np.save(self.path / "ivf_centroids.npy", centroids)
+        np.save(self.path / "ivf_assignments.npy", assignments)
+        self.centroids = centroids
+        self.lists = [np.flatnonzero(assignments == i) for i in range(n_lists)]
+        print(f"✅ IVF 인덱스 생성: {n_lists}개 list")
+
+    def search_by_vector(self, query_vector, k=5, n_probe=None, filters=None):
+        """질의 벡터 top-k 검색, [(index, score)] 반환
+
+        n_probe를 지정하고 IVF 인덱스가 있으면 가까운 n_probe개 list만 탐색합니다.
+        filters를 지정하면 조건에 맞는 문서만 후보로 사용합니다.
+        탐색한 list의 (filter 적용) 후보가 k개보다 적으면 전체 문서에서 다시 찾아 k개를 채웁니다.
+        """
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        candidates = None
+        if n_probe and self.centroids is not None:
+            probe = np.argsort(-(self.centroids @ query))[:n_probe]
+            candidates = np.concatenate([self.lists[i] for i in probe])
+            if filters:
+                candidates = self._filter_rows(candidates, filters)
+            if len(candidates) < k:
+                candidates = None
+        if candidates is None and filters:
+            candidates = self._filter_rows(range(len(self.ids)), filters)
+        scores = self.vectors[candidates] @ query if candidates is not None else self.vectors @ query
+
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        indices = candidates[top] if candidates is not None else top
+        return [(int(i), float(s)) for i, s in zip(indices, scores[top])]
+
+    def _filter_rows(self, rows, filters):
+        """filters 조건에 맞는 행 번호"""
+        return np.asarray([i for i in rows if _matches(self.sources[i], filters)], dtype=int)
+
+    def results_by_vector(self, query_vector, k=5, n_probe=None, filters=None):
+        """질의 벡터 검색 결과를 OpenSearchEmbeddingProcessor 검색 결과 형식(dict)으로 반환"""
+        results = []
+        for i, score in self.search_by_vector(query_vector, k, n_probe, filters):
+            source = self.sources[i]
+            if self.fields is not None:
+                source = {field: source[field] for field in self.fields if field in source}
+            results.append({"id": self.ids[i], "score": score, **source})
+        return results
+
+    def vector_search(self, query, k=5, n_probe=None, filters=None):
+        """OpenSearchEmbeddingProcessor.vector_search와 같은 형식의 검색"""
+        try:
+            return self.results_by_vector(self.embed_fn(query), k, n_probe, filters)
+        except Exception as e:
+            print(f"Local search error: {str(e)}")
+            return []
+
+
+def _matches(source, filters):
+    """OpenSearchEmbeddingProcessor._build_filter와 같은 조건을 로컬에서 평가"""
+    if filters.get("keywords") and not set(filters["keywords"]) & set(source.get("keywords", [])):
+        return False
+    if filters.get("chunk_id_range"):
+        start, end = filters["chunk_id_range"]
+        if source.get("chunk_id") is None or not start <= source["chunk_id"] <= end:
+            return False
+    if filters.get("parent_chunk_ids") and source.get("parent_chunk_id") not in filters["parent_chunk_ids"]:
+        return False
+    return True
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
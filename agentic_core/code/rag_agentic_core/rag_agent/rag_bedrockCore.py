@@ -1,128 +1,528 @@
 import asyncio
+import sys
+import time
 import boto3
 from langchain_aws import ChatBedrock
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from bedrock_agentcore.runtime import BedrockAgentCoreApp
+from langchain_core.runnables import RunnableLambda
+from bedrock_agentcore.runtime import BedrockAgentCoreApp, PingStatus
 import json
 import requests
 import numpy as np
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from pathlib import Path
 from requests.auth import HTTPBasicAuth
-from opensearchpy import OpenSearch, RequestsHttpConnection
 from langchain_aws import BedrockEmbeddings
-from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate
 from operator import itemgetter
 from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from boto3.session import Session
+from rag_cache import QueryEmbeddingCache, SemanticAnswerCache
+from local_vector_index import LocalVectorIndex
+from context_packing import ContextPacker
+from diversity import mmr_select
+from faq_index import FaqIndex
+
+# 로컬 실행 시 shared 모듈 경로 추가 (Runtime 배포 시에는 엔트리포인트 디렉터리로 복사됨)
+SHARED_DIR = Path(__file__).resolve().parents[2] / "shared"
+if SHARED_DIR.exists():
+    sys.path.append(str(SHARED_DIR))
+from client_registry import ClientRegistry
+from config_cache import ConfigCache
+from runtime_lifecycle import RuntimeLifecycle
+from llm_streaming import astream_text, astream_events_text
+from stream_emitter import StreamEmitter
+from index_profiles import EMBEDDING_FIELDS, get_profile, embedding_model_kwargs, encode_vector
 
 app = BedrockAgentCoreApp()
+# 프로세스 공용 boto3 / OpenSearch client
+registry = ClientRegistry()
+# Secrets Manager 조회 결과 캐시 (background 재조회)
+config_cache = ConfigCache(registry)
+OPENSEARCH_SECRET_ID = 'opensearch-credentials'
+
+# 검색 결과로 가져올 _source 필드 (context 조립에 필요한 필드만)
+RESULT_FIELDS = ["chunk_id", "parent_chunk_id", "start_char_idx", "end_char_idx", "content"]
+# 인덱스 mapping _meta에 프로필이 없을 때의 기본 임베딩 프로필
+DEFAULT_EMBEDDING_PROFILE = get_profile("float-1024")
 
 class OpenSearchEmbeddingProcessor:
     """OpenSearch 임베딩 처리 및 저장 클래스"""
     
-    def __init__(self, index_name= "aws-document-chunks" ):
+    def __init__(self, index_name= "aws-document-chunks", query_cache_size=1024, query_cache_ttl=3600,
+                 async_pool_size=50, result_fields=None):
         # AWS region
-
-        boto_session = Session()
-        region_name = boto3.Session().region_name
-
-        self.region = region_name
+        self.region = registry.region_name
         self.service = 'es'
         
         # AWS credential
-        self.session = boto3.Session()
+        self.session = registry.session
         self.credentials = self.session.get_credentials()
         
         # OpenSearch setting
-        secrets_client = boto3.client('secretsmanager', region_name=self.region)
-        response = secrets_client.get_secret_value(SecretId='opensearch-credentials')
-        secrets = json.loads(response['SecretString'])
-        self.username = secrets['username']
-        self.password = secrets['password'] 
-        self.host = secrets['opensearch_host']
         self.headers = {'Content-Type': 'application/json'}
-        
-        # embedding
+        self.async_pool_size = async_pool_size
+        self._connect(config_cache.secret(OPENSEARCH_SECRET_ID))
+        self.index_name = index_name
+        # 검색 결과 _source projection
+        self.result_fields = result_fields or RESULT_FIELDS
+
+        # embedding (색인 시 사용한 프로필과 동일한 차원/정규화 사용)
+        self.profile = self._load_embedding_profile()
         self.embeddings = self._setup_embeddings()
-        self.os_client = OpenSearch(
-                            hosts=[{'host': self.host, 'port': 443}],
-                            http_auth=(self.username, self.password),
-                            use_ssl=True,
-                            verify_certs=True,
-                            connection_class=RequestsHttpConnection
+        # 반복 질의의 Titan 호출을 줄이기 위한 질의 임베딩 캐시
+        self.query_cache = QueryEmbeddingCache(query_cache_size, query_cache_ttl)
+        # MMR용 문서 임베딩 캐시 (문서 id 기준, 벡터는 _source에 없으므로 재사용)
+        self.document_vector_cache = QueryEmbeddingCache(max_entries=4096, ttl_seconds=24 * 3600)
+        self._index_version = None
+        self._index_version_checked_at = None
+        # OpenSearch 장애 시 / 소규모 코퍼스용 로컬 벡터 인덱스
+        self.local_index = None
+        # expected_questions 기반 FAQ 질문 인덱스
+        self.faq_index = None
+
+    def _connect(self, secrets):
+        """secret의 자격 증명으로 OpenSearch client 설정"""
+        self.username = secrets['username']
+        self.password = secrets['password']
+        self.host = secrets['opensearch_host']
+        self.os_client = registry.opensearch(self.host, (self.username, self.password))
+        # 동시 요청이 하나의 aiohttp connection pool을 공유하는 async client
+        self.async_os_client = registry.async_opensearch(
+                            self.host, (self.username, self.password), pool_size=self.async_pool_size
                         )
-        self.index_name = index_name
+
+    def _sync_credentials(self):
+        """캐시된 secret이 background 재조회로 바뀌었으면 client 교체 (메모리 조회만 수행)"""
+        secrets = config_cache.secret(OPENSEARCH_SECRET_ID)
+        if (secrets['username'], secrets['password'], secrets['opensearch_host']) != (self.username, self.password, self.host):
+            print("🔑 OpenSearch 자격 증명 변경 감지, client 교체")
+            self._connect(secrets)
+
+    def _handle_auth_error(self, error):
+        """인증 실패(401/403) 시 secret 재조회 요청 (rotation 반영)
+
+        재조회는 config_cache의 background thread가 수행하므로 event loop를 막지 않고,
+        다음 검색의 _sync_credentials()에서 바뀐 자격 증명으로 client를 교체합니다.
+        """
+        if getattr(error, "status_code", None) not in (401, 403):
+            return
+        config_cache.request_secret_refresh(OPENSEARCH_SECRET_ID)
 
     def _setup_embeddings(self):
         """Bedrock 임베딩 모델 설정"""
         try:
             return BedrockEmbeddings(
-                client=boto3.client(
-                    service_name='bedrock-runtime',
-                    region_name=self.region
-                ),
-                model_id="amazon.titan-embed-text-v2:0"
+                client=registry.client('bedrock-runtime', self.region),
+                model_id="amazon.titan-embed-text-v2:0",
+                model_kwargs=embedding_model_kwargs(self.profile)
             )
         except Exception as e:
             print(f"❌ 임베딩 모델 초기화 실패: {e}")
             return None
 
+    def _load_embedding_profile(self):
+        """인덱스 mapping _meta.embedding_profile 조회"""
+        try:
+            mapping = self.os_client.indices.get_mapping(index=self.index_name)
+            meta = mapping.get(self.index_name, {}).get("mappings", {}).get("_meta", {})
+            return meta.get("embedding_profile", DEFAULT_EMBEDDING_PROFILE)
+        except Exception as e:
+            print(f"❌ 임베딩 프로필 조회 실패: {e}")
+            return DEFAULT_EMBEDDING_PROFILE
+
+    def _encode_query_vector(self, vector):
+        """byte 인코딩 인덱스는 색인 시와 같은 배율로 질의 벡터 양자화"""
+        return encode_vector(vector, self.profile)
+
     def get_embedding(self, text):
         """BedrockEmbeddings를 사용한 임베딩 생성"""
         if not self.embeddings:
             self.embeddings = self._setup_embeddings()
         return self.embeddings.embed_query(text)
 
-    def vector_search(self, query, k=5):
+    def get_query_embedding(self, query):
+        """질의 임베딩 (캐시 hit 시 Bedrock 호출 생략)"""
+        vector = self.query_cache.get(query)
+        if vector is None:
+            vector = self.get_embedding(query)
+            self.query_cache.put(query, vector)
+        return vector
+
+    def attach_local_index(self, path):
+        """로컬 벡터 인덱스 연결 (search mode "local" 및 OpenSearch 장애 시 fallback)"""
+        try:
+            self.local_index = LocalVectorIndex(path, embed_fn=self.get_query_embedding, fields=self.result_fields)
+            print(f"✅ 로컬 인덱스 연결: {len(self.local_index.ids)}건")
+        except Exception as e:
+            print(f"❌ 로컬 인덱스 로드 실패: {e}")
+            self.local_index = None
+
+    def attach_faq_index(self, path):
+        """FAQ 질문 인덱스 연결 (색인 시 임베딩 프로필이 현재 인덱스와 같을 때만 사용)"""
+        try:
+            faq_index = FaqIndex(path)
+            if faq_index.embedding_profile not in (None, self.profile["name"]):
+                print(f"⚠️ FAQ 인덱스 프로필 불일치 ({faq_index.embedding_profile} != {self.profile['name']}), 사용 안 함")
+                return
+            self.faq_index = faq_index
+            print(f"✅ FAQ 인덱스 연결: 질문 {len(faq_index.entries)}개")
+        except Exception as e:
+            print(f"❌ FAQ 인덱스 로드 실패: {e}")
+            self.faq_index = None
+
+    def match_faq(self, query_vector, threshold=0.9):
+        """질의 임베딩과 가장 유사한 예상 질문 (없거나 threshold 미만이면 None)"""
+        if self.faq_index is None:
+            return None
+        return self.faq_index.match(query_vector, threshold)
+
+    async def aget_result(self, doc_id, score=1.0):
+        """문서 id로 검색 결과 형식의 chunk 조회 (kNN 없이 단건 get)"""
+        try:
+            response = await self.async_os_client.get(
+                index=self.index_name, id=doc_id, _source_includes=self.result_fields
+            )
+            return {"id": doc_id, "score": score, **response["_source"]}
+        except Exception as e:
+            print(f"Get error: {str(e)}")
+            self._handle_auth_error(e)
+            if self.local_index is not None and doc_id in self.local_index.row_by_id:
+                source = self.local_index.sources[self.local_index.row_by_id[doc_id]]
+                return {"id": doc_id, "score": score, **{k: source[k] for k in self.result_fields if k in source}}
+            return None
+
+    def get_index_version(self, max_age=60):
+        """인덱스 버전(mapping _meta.index_version) 조회, max_age초 동안 재사용"""
+        now = time.monotonic()
+        if self._index_version_checked_at is not None and now - self._index_version_checked_at < max_age:
+            return self._index_version
+        try:
+            mapping = self.os_client.indices.get_mapping(index=self.index_name)
+            meta = mapping.get(self.index_name, {}).get("mappings", {}).get("_meta", {})
+            self._index_version = meta.get("index_version")
+        except Exception as e:
+            print(f"Index version error: {str(e)}")
+        self._index_version_checked_at = now
+        return self._index_version
+
+    async def aget_index_version(self, max_age=60):
+        """get_index_version()의 asyncio 버전"""
+        now = time.monotonic()
+        if self._index_version_checked_at is not None and now - self._index_version_checked_at < max_age:
+            return self._index_version
+        try:
+            mapping = await self.async_os_client.indices.get_mapping(index=self.index_name)
+            meta = mapping.get(self.index_name, {}).get("mappings", {}).get("_meta", {})
+            self._index_version = meta.get("index_version")
+        except Exception as e:
+            print(f"Index version error: {str(e)}")
+        self._index_version_checked_at = now
+        return self._index_version
+
+    def vector_search(self, query, k=5, ef_search=None, filters=None):
         try:
             # KNN vector search query
-            query_vector = self.get_embedding(query)
-            vector_search = {
-                "size": k,
-                "_source": {
-                    "excludes": ["content_embedding"]
-                },
-                "query": {
-                    "knn": {
-                        "content_embedding": {
-                            "vector": query_vector,
-                            "k": k
-                        }
-                    }
-                }
-            }
+            query_vector = self.get_query_embedding(query)
+            vector_search = self._knn_query(query_vector, k, ef_search=ef_search, filters=filters)
 
             # Execute the search
             response = self.os_client.search(
                 index=self.index_name,
                 body=vector_search
             )
+            return self._to_results(response["hits"]["hits"])
+
+        except Exception as e:
+            print(f"Search error: {str(e)}")
+            self._handle_auth_error(e)
+            if self.local_index is not None:
+                return self.local_index.vector_search(query, k, filters=filters)
+            return []
 
-            documents = []
-            for res in response["hits"]["hits"]:
-                source = res['_source']
-                page_content = {k: source[k] for k in source if k != "vector"}
-                metadata = {"id": res['_id']}
-                score = res['_score']
-                documents.append((Document(page_content=json.dumps(page_content, ensure_ascii=False), metadata=metadata), score))
-            return documents
+    def hybrid_search(self, query, k=5, candidate_k=None, rank_constant=60, ef_search=None, filters=None):
+        """BM25 + kNN 검색을 한 번의 _msearch로 실행 후 RRF로 병합"""
+        try:
+            query_vector = self.get_query_embedding(query)
+            body = self._hybrid_body(query, query_vector, candidate_k or k * 2, ef_search, filters)
+            response = self.os_client.msearch(index=self.index_name, body=body)
+            return self._rrf_merge(self._ranked_lists(response), k, rank_constant)
 
         except Exception as e:
             print(f"Search error: {str(e)}")
+            self._handle_auth_error(e)
             return []
 
+    def multi_vector_search(self, query, k=5, fields=None, candidate_k=None, weights=None, ef_search=None,
+                            filters=None):
+        """content/summary/expected_question 임베딩 필드를 한 번의 _msearch로 검색 후 chunk별 병합
+
+        chunk별 점수는 필드별 (가중) 점수 중 최댓값을 사용합니다.
+        """
+        try:
+            fields = fields or EMBEDDING_FIELDS
+            query_vector = self.get_query_embedding(query)
+            body = self._multi_vector_body(query_vector, fields, candidate_k or k, ef_search, filters)
+            response = self.os_client.msearch(index=self.index_name, body=body)
+            return self._max_score_merge(fields, response, k, weights or {})
+
+        except Exception as e:
+            print(f"Search error: {str(e)}")
+            self._handle_auth_error(e)
+            return []
+
+    def search(self, query, k=5, mode="vector", ef_search=None, filters=None):
+        """검색 모드(vector | hybrid | multi_vector | local)에 따라 문서 검색
+
+        ef_search를 지정하면 인덱스 preset의 기본 ef_search 대신 요청 단위로 사용합니다.
+        filters는 kNN 탐색 전에 적용되는 메타데이터 조건입니다 (_build_filter 참고).
+        """
+        self._sync_credentials()
+        if mode == "local" and self.local_index is not None:
+            return self.local_index.vector_search(query, k, filters=filters)
+        if mode == "hybrid":
+            return self.hybrid_search(query, k, ef_search=ef_search, filters=filters)
+        if mode == "multi_vector":
+            return self.multi_vector_search(query, k, ef_search=ef_search, filters=filters)
+        return self.vector_search(query, k, ef_search=ef_search, filters=filters)
+
+    # ---- asyncio 검색 경로 (event loop를 막지 않고 하나의 connection pool 공유) ----
+
+    async def aget_query_embedding(self, query):
+        """질의 임베딩 (async, 캐시 hit 시 Bedrock 호출 생략)"""
+        vector = self.query_cache.get(query)
+        if vector is None:
+            if not self.embeddings:
+                self.embeddings = self._setup_embeddings()
+            vector = await self.embeddings.aembed_query(query)
+            self.query_cache.put(query, vector)
+        return vector
+
+    async def avector_search(self, query, k=5, ef_search=None, filters=None):
+        try:
+            query_vector = await self.aget_query_embedding(query)
+            response = await self.async_os_client.search(
+                index=self.index_name,
+                body=self._knn_query(query_vector, k, ef_search=ef_search, filters=filters)
+            )
+            return self._to_results(response["hits"]["hits"])
+
+        except Exception as e:
+            print(f"Search error: {str(e)}")
+            self._handle_auth_error(e)
+            if self.local_index is not None:
+                return await self.alocal_search(query, k, filters=filters)
+            return []
+
+    async def alocal_search(self, query, k=5, filters=None):
+        """로컬 벡터 인덱스 검색 (async 질의 임베딩 사용, event loop에서 Bedrock 동기 호출 없음)"""
+        try:
+            query_vector = await self.aget_query_embedding(query)
+            return self.local_index.results_by_vector(query_vector, k, filters=filters)
+        except Exception as e:
+            print(f"Local search error: {str(e)}")
+            return []
+
+    async def ahybrid_search(self, query, k=5, candidate_k=None, rank_constant=60, ef_search=None, filters=None):
+        try:
+            query_vector = await self.aget_query_embedding(query)
+            body = self._hybrid_body(query, query_vector, candidate_k or k * 2, ef_search, filters)
+            response = await self.async_os_client.msearch(index=self.index_name, body=body)
+            return self._rrf_merge(self._ranked_lists(response), k, rank_constant)
+
+        except Exception as e:
+            print(f"Search error: {str(e)}")
+            self._handle_auth_error(e)
+            return []
+
+    async def amulti_vector_search(self, query, k=5, fields=None, candidate_k=None, weights=None,
+                                   ef_search=None, filters=None):
+        try:
+            fields = fields or EMBEDDING_FIELDS
+            query_vector = await self.aget_query_embedding(query)
+            body = self._multi_vector_body(query_vector, fields, candidate_k or k, ef_search, filters)
+            response = await self.async_os_client.msearch(index=self.index_name, body=body)
+            return self._max_score_merge(fields, response, k, weights or {})
+
+        except Exception as e:
+            print(f"Search error: {str(e)}")
+            self._handle_auth_error(e)
+            return []
+
+    async def asearch(self, query, k=5, mode="vector", ef_search=None, filters=None):
+        """search()의 asyncio 버전"""
+        self._sync_credentials()
+        if mode == "local" and self.local_index is not None:
+            return await self.alocal_search(query, k, filters=filters)
+        if mode == "hybrid":
+            return await self.ahybrid_search(query, k, ef_search=ef_search, filters=filters)
+        if mode == "multi_vector":
+            return await self.amulti_vector_search(query, k, ef_search=ef_search, filters=filters)
+        return await self.avector_search(query, k, ef_search=ef_search, filters=filters)
+
+    async def amax_marginal_relevance_search(self, query, k=5, fetch_k=None, lambda_mult=0.5, mode="vector",
+                                             ef_search=None, filters=None):
+        """fetch_k개 후보를 검색한 뒤 MMR로 관련도와 다양성을 고려해 k개 선택
+
+        overlap이 있는 인접 chunk처럼 거의 같은 결과가 중복 선택되는 것을 줄입니다.
+        """
+        candidates = await self.asearch(query, fetch_k or k * 4, mode, ef_search, filters)
+        if len(candidates) <= k:
+            return candidates
+        try:
+            query_vector = await self.aget_query_embedding(query)
+            selected = mmr_select(query_vector, await self.aget_result_vectors(candidates), k, lambda_mult)
+            return [candidates[i] for i in selected]
+        except Exception as e:
+            print(f"MMR error: {str(e)}")
+            return candidates[:k]
+
+    async def aget_result_vectors(self, results):
+        """검색 결과의 content 임베딩 행렬
+
+        인덱스 mapping은 벡터를 _source에서 제외하므로 캐시 → 로컬 인덱스 → content 재임베딩 순으로 조회합니다.
+        """
+        vectors, missing = [], []
+        for i, result in enumerate(results):
+            vector = self.document_vector_cache.get(result["id"])
+            if vector is None and self.local_index is not None:
+                vector = self.local_index.vector_by_id(result["id"])
+            if vector is None:
+                missing.append(i)
+            vectors.append(vector)
+        if missing:
+            if not self.embeddings:
+                self.embeddings = self._setup_embeddings()
+            embedded = await self.embeddings.aembed_documents([results[i]["content"] for i in missing])
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+                self.document_vector_cache.put(results[i]["id"], vector)
+        return np.asarray(vectors, dtype=np.float32)
+
+    # ---- 검색 요청 body / 결과 병합 ----
+
+    def _hybrid_body(self, query, query_vector, candidate_k, ef_search=None, filters=None):
+        lexical_search = {
+            "size": candidate_k,
+            "_source": {
+                "includes": self.result_fields
+            },
+            "query": {
+                "bool": {
+                    "must": {
+                        "multi_match": {
+                            "query": query,
+                            "fields": ["content", "summary", "expected_question"]
+                        }
+                    },
+                    "filter": self._build_filter(filters) or []
+                }
+            }
+        }
+        return [
+            {}, lexical_search,
+            {}, self._knn_query(query_vector, candidate_k, ef_search=ef_search, filters=filters)
+        ]
+
+    def _multi_vector_body(self, query_vector, fields, candidate_k, ef_search=None, filters=None):
+        body = []
+        for field in fields:
+            body.extend([{}, self._knn_query(query_vector, candidate_k, field, ef_search, filters)])
+        return body
+
+    def _ranked_lists(self, response):
+        ranked_lists = []
+        for result in response["responses"]:
+            if "error" in result:
+                print(f"Search error: {result['error']}")
+                continue
+            ranked_lists.append(result["hits"]["hits"])
+        return ranked_lists
+
+    def _max_score_merge(self, fields, response, k, weights):
+        best_scores, hits_by_id = {}, {}
+        for field, result in zip(fields, response["responses"]):
+            if "error" in result:
+                print(f"Search error: {result['error']}")
+                continue
+            for hit in result["hits"]["hits"]:
+                score = hit["_score"] * weights.get(field, 1.0)
+                if score > best_scores.get(hit["_id"], float("-inf")):
+                    best_scores[hit["_id"]] = score
+                hits_by_id.setdefault(hit["_id"], hit)
+        top_ids = sorted(best_scores, key=best_scores.get, reverse=True)[:k]
+        return self._to_results([hits_by_id[doc_id] for doc_id in top_ids],
+                                  [best_scores[doc_id] for doc_id in top_ids])
+
+    def _build_filter(self, filters):
+        """메타데이터 filter 생성
+
+        filters 예시:
+            {"keywords": ["Amazon S3"], "chunk_id_range": [10, 50], "parent_chunk_ids": [3, 4]}
+        """
+        if not filters:
+            return None
+        clauses = []
+        if filters.get("keywords"):
+            clauses.append({"terms": {"keywords": filters["keywords"]}})
+        if filters.get("chunk_id_range"):
+            start, end = filters["chunk_id_range"]
+            clauses.append({"range": {"chunk_id": {"gte": start, "lte": end}}})
+        if filters.get("parent_chunk_ids"):
+            clauses.append({"terms": {"parent_chunk_id": filters["parent_chunk_ids"]}})
+        return {"bool": {"filter": clauses}} if clauses else None
+
+    def _knn_query(self, query_vector, k, field="content_embedding", ef_search=None, filters=None):
+        knn = {
+            "vector": self._encode_query_vector(query_vector),
+            "k": k
+        }
+        if ef_search:
+            knn["method_parameters"] = {"ef_search": ef_search}
+        # knn 내부 filter: 탐색 중 조건을 적용하는 efficient filtering (post-filter 아님)
+        knn_filter = self._build_filter(filters)
+        if knn_filter:
+            knn["filter"] = knn_filter
+        return {
+            "size": k,
+            "_source": {
+                "includes": self.result_fields
+            },
+            "query": {
+                "knn": {
+                    field: knn
+                }
+            }
+        }
+
+    def _rrf_merge(self, ranked_lists, k, rank_constant=60):
+        """Reciprocal Rank Fusion: score = Σ 1 / (rank_constant + rank)"""
+        fused_scores, hits_by_id = {}, {}
+        for hits in ranked_lists:
+            for rank, hit in enumerate(hits, start=1):
+                fused_scores[hit["_id"]] = fused_scores.get(hit["_id"], 0.0) + 1.0 / (rank_constant + rank)
+                hits_by_id.setdefault(hit["_id"], hit)
+        top_ids = sorted(fused_scores, key=fused_scores.get, reverse=True)[:k]
+        return self._to_results([hits_by_id[doc_id] for doc_id in top_ids],
+                                  [fused_scores[doc_id] for doc_id in top_ids])
+
+    def _to_results(self, hits, scores=None):
+        """검색 hit을 {"id", "score", projection 필드} dict로 변환"""
+        results = []
+        for i, res in enumerate(hits):
+            score = scores[i] if scores is not None else res['_score']
+            results.append({"id": res['_id'], "score": score, **res['_source']})
+        return results
+
 
 class RagLLM:
     """RagLLM 스트리밍 관리자"""
     
     def __init__(self):
-        boto_session = Session()
-        region_name = boto3.Session().region_name
-        self.region_name = region_name
+        self.region_name = registry.region_name
         self.model_id = None
         self.bedrock_client = self._setup_bedrock_client()
         self.llm = self._setup_llm()
@@ -130,10 +530,7 @@ class RagLLM:
     def _setup_bedrock_client(self):
         """Bedrock 클라이언트 설정"""
         try:
-            return boto3.client(
-                service_name='bedrock-runtime',
-                region_name=self.region_name
-            )
+            return registry.client('bedrock-runtime', self.region_name)
         except Exception as e:
             print(f"❌ Bedrock 클라이언트 초기화 실패: {e}")
             return None
@@ -159,9 +556,54 @@ class RagLLM:
             return None
 
 
+# 배포 디렉터리에 로컬 인덱스가 있으면 fallback으로 사용
+LOCAL_INDEX_PATH = Path(__file__).parent / "local_index"
+# 배포 디렉터리에 FAQ 질문 인덱스가 있으면 예상 질문 fast path 사용
+FAQ_INDEX_PATH = Path(__file__).parent / "faq_index"
+
+
+
+def create_opensearch_processor():
+    """OpenSearch 검색 processor 생성 (로컬 인덱스가 있으면 fallback으로 연결)"""
+    processor = OpenSearchEmbeddingProcessor()
+    if LOCAL_INDEX_PATH.exists():
+        processor.attach_local_index(LOCAL_INDEX_PATH)
+    if FAQ_INDEX_PATH.exists():
+        processor.attach_faq_index(FAQ_INDEX_PATH)
+    return processor
+
+
+# 앱 시작 시 warmup, 첫 요청과 겹쳐도 한 번만 초기화
+lifecycle = RuntimeLifecycle()
+llm_resource = lifecycle.resource("llm", RagLLM)
+opensearch_resource = lifecycle.resource("opensearch", create_opensearch_processor)
+# Bedrock / OpenSearch TLS connection 미리 열기 및 인덱스 버전 조회
+lifecycle.on_warmup(registry.warmup)
+lifecycle.on_warmup(lambda: opensearch_resource.get().get_index_version())
+
+
+@app.ping
+def ping_status():
+    """warmup 진행 중에는 HealthyBusy 보고"""
+    return PingStatus.HEALTHY_BUSY if lifecycle.warming else PingStatus.HEALTHY
+
+
 # 전역 변수
 agent = None
 opensearh = None
+# 유사 질문 답변 캐시 (cosine 유사도 threshold 이상이면 재사용)
+answer_cache = SemanticAnswerCache(threshold=0.95, ttl_seconds=1800)
+
+
+async def lookup_cached_answer(question, namespace=None):
+    """답변 캐시 조회 (같은 검색 설정 namespace 안에서), (질의 임베딩, 캐시된 답변) 반환"""
+    try:
+        answer_cache.set_index_version(await opensearh.aget_index_version())
+        query_vector = await opensearh.aget_query_embedding(question)
+        return query_vector, answer_cache.get(query_vector, namespace)
+    except Exception as e:
+        print(f"Answer cache error: {str(e)}")
+        return None, None
 
 
 def get_prompt():
@@ -190,21 +632,93 @@ async def extract_text(payload):
     global agent
     global opensearh
     
-    if agent is None:
+    if not llm_resource.ready:
         yield {"type": "status", "message": "🚀 LLM 초기화 중..."}
-        agent = RagLLM()
-    if opensearh is None:
+    agent = await llm_resource.aget()
+    if not opensearch_resource.ready:
         yield {"type": "status", "message": "🚀 Opensearch Connection 초기화 중..."}
-        opensearh = OpenSearchEmbeddingProcessor()
+    opensearh = await opensearch_resource.aget()
+    # 요청을 처리하는 async OpenSearch client connection은 event loop에서 한 번만 미리 열기
+    registry.schedule_awarmup()
     
     # payload에서 입력 데이터 추출
     user_input = payload.get("input_data", "태양의 온도에 대해 말해줘")
 
+    # 스트리밍 경로: direct (검색 후 LLM.astream 직접 구동) | events (chain.astream_events)
+    stream_mode = payload.get("stream_mode", "direct")
+    # 응답 frame 병합: frame_bytes 크기 또는 flush_ms 간격마다 전송, final_content=False면 final에 메타데이터만 포함
+    emitter = StreamEmitter(
+        max_bytes=payload.get("frame_bytes", 512),
+        flush_interval=payload.get("flush_ms", 50) / 1000,
+        final_content=payload.get("final_content", True)
+    )
+    usage = {}
+    # 검색 모드: vector (kNN) | hybrid (BM25 + kNN, RRF 병합) | multi_vector (임베딩 필드별 kNN 병합)
+    search_mode = payload.get("search_mode", "vector")
+    # 요청 단위 HNSW ef_search override (latency / recall 조정)
+    ef_search = payload.get("ef_search")
+    # 메타데이터 filter (keywords, chunk_id_range, parent_chunk_ids)
+    filters = payload.get("filters")
+    # context 조립: 검색 개수, score cutoff, 프롬프트 context token budget
+    k = payload.get("k", 5)
+    # MMR 다양화: k * 4개 후보 중 관련도 / 다양성 균형(mmr_lambda)으로 k개 선택
+    use_mmr = payload.get("mmr", False)
+    mmr_lambda = payload.get("mmr_lambda", 0.5)
+    packer = ContextPacker(token_budget=payload.get("token_budget", 3000), min_score=payload.get("min_score"))
+
+    # 유사 질문의 답변이 캐시에 있으면 검색/생성 없이 바로 반환 (filter 범위 질문은 제외)
+    query_vector, cached_answer = None, None
+    use_cache = payload.get("use_cache", True) and not filters
+    # 답변에 영향을 주는 검색 / context 설정이 같은 요청끼리만 캐시 답변 재사용
+    cache_namespace = (search_mode, k, use_mmr, mmr_lambda if use_mmr else None,
+                       packer.token_budget, packer.min_score)
+    if use_cache:
+        query_vector, cached_answer = await lookup_cached_answer(user_input, cache_namespace)
+    if cached_answer is not None:
+        yield emitter.emit(cached_answer)
+        yield emitter.final(source="answer_cache")
+        return
+
+    # 예상 질문(FAQ)과 매우 유사하면 kNN 검색 없이 해당 chunk 사용, 미리 생성한 답변이 있으면 바로 반환
+    faq_match = None
+    if opensearh.faq_index is not None and payload.get("use_faq", True) and not filters:
+        try:
+            if query_vector is None:
+                query_vector = await opensearh.aget_query_embedding(user_input)
+            faq_match = opensearh.match_faq(query_vector, payload.get("faq_threshold", 0.9))
+        except Exception as e:
+            print(f"FAQ match error: {str(e)}")
+    if faq_match is not None and faq_match.get("answer"):
+        yield emitter.emit(faq_match["answer"])
+        yield emitter.final(source="faq")
+        return
+
     rag_prompt = get_prompt()
+    # 검색 결과로 만든 passage 수 (검색 실패 / 결과 없음이면 0 → 답변 캐시에 저장하지 않음)
+    retrieval = {"passages": 0}
+
+    async def retrieve_documents(_):
+        # async client로 검색하여 event loop를 막지 않음
+        if faq_match is not None:
+            result = await opensearh.aget_result(faq_match["doc_id"], faq_match["similarity"])
+            if result is not None:
+                passages = packer.pack([result])
+                retrieval["passages"] = len(passages)
+                return packer.render(passages)
+        if use_mmr:
+            results = await opensearh.amax_marginal_relevance_search(
+                user_input, k=k, lambda_mult=mmr_lambda, mode=search_mode, ef_search=ef_search, filters=filters
+            )
+        else:
+            results = await opensearh.asearch(user_input, k=k, mode=search_mode, ef_search=ef_search, filters=filters)
+        # overlap chunk 병합 / score cutoff / token budget 적용
+        passages = packer.pack(results)
+        retrieval["passages"] = len(passages)
+        return packer.render(passages)
 
     chain_lambda_rag = (
         {
-            "document": lambda x: opensearh.vector_search(user_input),
+            "document": RunnableLambda(retrieve_documents),
             "question": itemgetter("question")
         }
         | rag_prompt
@@ -214,35 +728,32 @@ async def extract_text(payload):
     
     yield {"type": "status", "message": "🔥 응답 생성 중..."}
     
-    collected_text = []
+    failed = False
     try:
-        async for event in chain_lambda_rag.astream_events({"question": user_input}):
-            if event["event"] == "on_chat_model_stream":
-                chunk = event["data"]["chunk"]
-                if hasattr(chunk, 'content') and chunk.content:
-                    if isinstance(chunk.content, str):
-                        collected_text.append(chunk.content)
-                        yield {"type": "stream", "content": chunk.content}
-                    elif isinstance(chunk.content, list):
-                        for content_item in chunk.content:
-                            if isinstance(content_item, dict):
-                                if text := content_item.get('text'):
-                                    collected_text.append(text)
-                                    yield {"type": "stream", "content": text}
-                            elif isinstance(content_item, str):
-                                collected_text.append(content_item)
-                                yield {"type": "stream", "content": content_item}
+        if stream_mode == "events":
+            deltas = astream_events_text(chain_lambda_rag, {"question": user_input})
+        else:
+            prompt_value = await rag_prompt.ainvoke({"document": await retrieve_documents(None), "question": user_input})
+            deltas = astream_text(agent.llm, prompt_value, usage=usage)
+        async for frame in emitter.frames(deltas):
+            yield frame
                                 
     except Exception as e:
+        failed = True
+        if frame := emitter.flush():
+            yield frame
         yield {"type": "error", "message": f"❌ 스트리밍 실패: {e}"}
     
     # 최종 결과
-    final_text = "".join(collected_text)
-    yield {"type": "final", "content": final_text}
+    final_text = emitter.text
+    if use_cache and query_vector is not None and final_text and not failed and retrieval["passages"]:
+        answer_cache.put(query_vector, final_text, cache_namespace)
+    yield emitter.final(usage)
 
 
 
 if __name__ == "__main__":
+    lifecycle.warmup()
     app.run()
 
 
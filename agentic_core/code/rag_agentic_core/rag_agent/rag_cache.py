@@ -0,0 +1,160 @@
+"""
+rag_cache.py
+RAG Runtime용 in-process 캐시
+
+- QueryEmbeddingCache: 정규화된 질의 텍스트 기준 임베딩 LRU + TTL 캐시
+- SemanticAnswerCache: 질의 임베딩 유사도 기준 답변 캐시 (인덱스 버전 변경 시 무효화)
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_query(text):
+    """캐시 키용 질의 정규화 (유니코드 NFKC, 소문자, 공백 정리)"""
+    text = unicodedata.normalize("NFKC", text).lower().strip()
+    return re.sub(r"\s+", " ", text)
+
+
+class QueryEmbeddingCache:
+    """질의 임베딩 LRU + TTL 캐시"""
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query):
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                vector, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, query, vector):
+        key = normalize_query(query)
+        with self._lock:
+            self._entries[key] = (vector, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """캐시 hit-rate 통계"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+class SemanticAnswerCache:
+    """질의 임베딩 cosine 유사도 기반 답변 캐시"""
+
+    def __init__(self, threshold=0.95, ttl_seconds=1800, max_entries=512):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.index_version = None
+        self.hits = 0
+        self.misses = 0
+        self._vectors = None      # (n, dim) 정규화된 질의 임베딩
+        self._answers = []
+        self._namespaces = []     # 답변을 만든 검색 설정 (같은 namespace끼리만 재사용)
+        self._expires_at = []
+        self._last_used = []
+        self._lock = threading.Lock()
+
+    def set_index_version(self, version):
+        """인덱스 버전이 바뀌면 캐시 전체 무효화"""
+        with self._lock:
+            if version != self.index_version:
+                self.index_version = version
+                self._reset()
+
+    def get(self, query_vector, namespace=None):
+        """같은 namespace에서 가장 유사한 과거 질의의 답변 반환 (threshold 미만이면 None)"""
+        query = self._normalize(query_vector)
+        with self._lock:
+            self._purge_expired()
+            if self._vectors is None:
+                self.misses += 1
+                return None
+            similarities = self._vectors @ query
+            similarities[[ns != namespace for ns in self._namespaces]] = -np.inf
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._last_used[best] = time.monotonic()
+            return self._answers[best]
+
+    def put(self, query_vector, answer, namespace=None):
+        query = self._normalize(query_vector)[np.newaxis, :]
+        now = time.monotonic()
+        with self._lock:
+            self._vectors = query if self._vectors is None else np.vstack([self._vectors, query])
+            self._answers.append(answer)
+            self._namespaces.append(namespace)
+            self._expires_at.append(now + self.ttl_seconds)
+            self._last_used.append(now)
+            if len(self._answers) > self.max_entries:
+                self._remove(int(np.argmin(self._last_used)))
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._answers),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "index_version": self.index_version,
+            }
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _reset(self):
+        self._vectors = None
+        self._answers, self._namespaces, self._expires_at, self._last_used = [], [], [], []
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        for i in reversed(range(len(self._expires_at))):
+            if self._expires_at[i] <= now:
+                self._remove(i)
+
+    def _remove(self, i):
+        del self._answers[i], self._namespaces[i], self._expires_at[i], self._last_used[i]
+        self._vectors = np.delete(self._vectors, i, axis=0) if self._answers else None
@@ -0,0 +1,155 @@
+"""
+client_registry.py
+AgentCore Runtime 공용 client registry
+
+- boto3 Session / client / resource를 프로세스 단위로 한 번만 생성하여 공유
+- botocore Config로 connection pool 크기, TCP keep-alive, retry 설정
+- OpenSearch sync / async client 공유 및 connection pool 크기 설정
+- 시작 시 TLS connection을 미리 열어 첫 요청의 handshake 비용 제거
+
+Runtime 배포 시 runtime_utils.bundle_shared_modules()가 엔트리포인트 디렉터리로 복사합니다.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+
+DEFAULT_BOTO_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    connect_timeout=5,
+    read_timeout=300,
+    retries={"max_attempts": 4, "mode": "adaptive"},
+)
+
+
+class ClientRegistry:
+    """프로세스 공용 client registry"""
+
+    def __init__(self, region_name=None, boto_config=DEFAULT_BOTO_CONFIG, opensearch_pool_size=50):
+        # boto3 Session 자체는 thread-safe하지 않으므로 client 생성은 lock 안에서 수행
+        self.session = boto3.Session(region_name=region_name)
+        self.region_name = self.session.region_name or 'us-west-2'
+        self.boto_config = boto_config
+        self.opensearch_pool_size = opensearch_pool_size
+        self._objects = {}
+        self._lock = threading.RLock()
+        self._awarmup_task = None
+
+    def get(self, key, factory):
+        """key별 객체를 한 번만 생성하여 공유 (LLM 등 client 외 객체에도 사용)"""
+        obj = self._objects.get(key)
+        if obj is None:
+            with self._lock:
+                obj = self._objects.get(key)
+                if obj is None:
+                    obj = factory()
+                    self._objects[key] = obj
+        return obj
+
+    def client(self, service_name, region_name=None):
+        """공유 boto3 client (boto3 client는 thread-safe)"""
+        region = region_name or self.region_name
+        return self.get(
+            ("client", service_name, region),
+            lambda: self.session.client(service_name, region_name=region, config=self.boto_config)
+        )
+
+    def resource(self, service_name, region_name=None):
+        """boto3 resource (resource는 thread-safe하지 않으므로 thread별로 공유)"""
+        region = region_name or self.region_name
+        return self.get(
+            ("resource", service_name, region, threading.get_ident()),
+            lambda: self.session.resource(service_name, region_name=region, config=self.boto_config)
+        )
+
+    def opensearch(self, host, http_auth, port=443, pool_size=None):
+        """공유 OpenSearch client (requests connection pool)"""
+        from opensearchpy import OpenSearch, RequestsHttpConnection
+
+        return self.get(
+            ("opensearch", host, port, http_auth),
+            lambda: OpenSearch(
+                hosts=[{'host': host, 'port': port}],
+                http_auth=http_auth,
+                use_ssl=True,
+                verify_certs=True,
+                connection_class=RequestsHttpConnection,
+                pool_maxsize=pool_size or self.opensearch_pool_size
+            )
+        )
+
+    def async_opensearch(self, host, http_auth, port=443, pool_size=None):
+        """공유 AsyncOpenSearch client (aiohttp connection pool)"""
+        from opensearchpy import AsyncOpenSearch, AIOHttpConnection
+
+        return self.get(
+            ("async_opensearch", host, port, http_auth),
+            lambda: AsyncOpenSearch(
+                hosts=[{'host': host, 'port': port}],
+                http_auth=http_auth,
+                use_ssl=True,
+                verify_certs=True,
+                connection_class=AIOHttpConnection,
+                maxsize=pool_size or self.opensearch_pool_size
+            )
+        )
+
+    def warmup(self, services=("bedrock-runtime",), connections=2):
+        """boto3 / OpenSearch client의 TLS connection을 미리 열어 pool에 유지
+
+        bedrock-runtime은 존재하지 않는 모델 호출로 handshake + SigV4 round trip만 수행하고
+        (ValidationException 등은 무시), OpenSearch는 ping을 사용합니다.
+        """
+        tasks = []
+        for service_name in services:
+            client = self.client(service_name)
+            if service_name == "bedrock-runtime":
+                tasks.extend([lambda c=client: _probe_bedrock(c)] * connections)
+        for key, obj in list(self._objects.items()):
+            if key[0] == "opensearch":
+                tasks.extend([obj.ping] * connections)
+        if not tasks:
+            return
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            list(executor.map(_ignore_errors, tasks))
+        print(f"✅ client warmup 완료: {len(tasks)}개 connection")
+
+    async def awarmup(self, connections=2):
+        """AsyncOpenSearch client connection 미리 열기 (event loop 안에서 호출)"""
+        clients = [obj for key, obj in list(self._objects.items()) if key[0] == "async_opensearch"]
+        await asyncio.gather(
+            *[client.ping() for client in clients for _ in range(connections)],
+            return_exceptions=True
+        )
+        if clients:
+            print(f"✅ async client warmup 완료: {len(clients) * connections}개 connection")
+
+    def schedule_awarmup(self, connections=2):
+        """실행 중인 event loop에서 awarmup을 한 번만 background task로 시작
+
+        AsyncOpenSearch connection은 요청을 처리하는 event loop에 묶이므로 warmup()의 thread가 아닌
+        첫 요청 시점에 호출합니다. 질의 임베딩 등과 겹쳐 실행되어 검색 시점에는 handshake가 끝나 있습니다.
+        """
+        if self._awarmup_task is None:
+            self._awarmup_task = asyncio.get_running_loop().create_task(self.awarmup(connections))
+        return self._awarmup_task
+
+
+def _probe_bedrock(client):
+    try:
+        client.invoke_model(modelId="warmup", body=b"{}")
+    except ClientError:
+        pass
+
+
+def _ignore_errors(task):
+    try:
+        task()
+    except Exception as e:
+        print(f"⚠️ warmup 실패: {e}")
@@ -0,0 +1,141 @@
+"""
+config_cache.py
+Secrets Manager / SSM Parameter Store 조회 결과 TTL 캐시
+
+- 최초 조회 후에는 메모리 캐시에서 반환 (요청 경로에서 API 호출 없음)
+- background thread가 TTL 만료 전에 미리 재조회 (refresh-ahead)
+- 재조회 실패 시 기존 값을 계속 사용
+- 인증 실패로 자격 증명 교체(rotation)가 의심되면 refresh_*로 즉시 재조회,
+  async 요청 경로에서는 request_*_refresh로 background thread에 재조회 요청 (event loop를 막지 않음)
+
+Runtime 배포 시 runtime_utils.bundle_shared_modules()가 엔트리포인트 디렉터리로 복사합니다.
+"""
+
+import json
+import threading
+import time
+
+
+class ConfigCache:
+    """secret / parameter TTL 캐시"""
+
+    def __init__(self, registry, ttl_seconds=300, refresh_interval=60):
+        self.registry = registry
+        self.ttl_seconds = ttl_seconds
+        self.refresh_interval = refresh_interval
+        self.fetches = 0
+        self._entries = {}        # (kind, name) -> (value, fetched_at)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._refresher = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._requested = set()
+
+    def secret(self, secret_id):
+        """Secrets Manager secret (JSON이면 dict로 반환)"""
+        return self._get(("secret", secret_id))
+
+    def parameter(self, name):
+        """SSM parameter 값 (SecureString은 복호화)"""
+        return self._get(("parameter", name))
+
+    def refresh_secret(self, secret_id):
+        """secret 즉시 재조회 (인증 실패 시 호출)"""
+        return self._refresh(("secret", secret_id))
+
+    def refresh_parameter(self, name):
+        """parameter 즉시 재조회"""
+        return self._refresh(("parameter", name))
+
+    def request_secret_refresh(self, secret_id):
+        """background thread에 secret 재조회 요청 (바로 반환)"""
+        self._request_refresh(("secret", secret_id))
+
+    def request_parameter_refresh(self, name):
+        """background thread에 parameter 재조회 요청 (바로 반환)"""
+        self._request_refresh(("parameter", name))
+
+    def start(self):
+        """background 재조회 thread 시작 (중복 호출 시 무시)"""
+        with self._lock:
+            if self._refresher is None or not self._refresher.is_alive():
+                self._stop.clear()
+                self._refresher = threading.Thread(target=self._refresh_loop, name="config-cache-refresh", daemon=True)
+                self._refresher.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "fetches": self.fetches,
+                "max_age_seconds": round(max((now - fetched_at for _, fetched_at in self._entries.values()), default=0), 1),
+            }
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry[0]
+        # 최초 조회만 동기 호출, 이후에는 background thread가 갱신
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0]
+            value = self._fetch(key)
+        self.start()
+        return value
+
+    def _refresh(self, key):
+        with self._key_lock(key):
+            return self._fetch(key)
+
+    def _fetch(self, key):
+        kind, name = key
+        if kind == "secret":
+            response = self.registry.client('secretsmanager').get_secret_value(SecretId=name)
+            value = response['SecretString']
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError:
+                pass
+        else:
+            response = self.registry.client('ssm').get_parameter(Name=name, WithDecryption=True)
+            value = response["Parameter"]["Value"]
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self.fetches += 1
+        return value
+
+    def _request_refresh(self, key):
+        with self._lock:
+            self._requested.add(key)
+        self.start()
+        self._wake.set()
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _refresh_loop(self):
+        while True:
+            # 주기마다 또는 재조회 요청 시 깨어남
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            # 요청된 항목과 다음 주기 전에 TTL이 끝나는 항목을 미리 재조회
+            deadline = time.monotonic() - self.ttl_seconds + self.refresh_interval
+            with self._lock:
+                stale = [key for key, (_, fetched_at) in self._entries.items() if fetched_at <= deadline]
+                stale += [key for key in self._requested if key not in stale]
+                self._requested.clear()
+            for key in stale:
+                try:
+                    self._refresh(key)
+                except Exception as e:
+                    print(f"⚠️ 설정 재조회 실패 ({key[1]}), 기존 값 사용: {e}")
@@ -0,0 +1,124 @@
+"""
+embedding_cache.py
+SQLite 기반 로컬 임베딩 캐시
+
+- (model_id, dimension, 텍스트 sha256) 키로 임베딩 벡터를 디스크에 저장
+- 최대 항목 수를 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+- hit/miss 카운터 제공
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """디스크 영속 임베딩 캐시"""
+
+    def __init__(self, path, model_id, dimension=1024, max_entries=200_000):
+        self.path = str(path)
+        self.model_id = model_id
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model_id TEXT NOT NULL,
+                dimension INTEGER NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model_id, dimension, text_hash)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def text_hash(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, texts):
+        """텍스트 목록의 캐시 조회 (없는 항목은 None)"""
+        hashes = [self.text_hash(text) for text in texts]
+        found = {}
+        with self._lock:
+            # SQLite 변수 개수 제한을 피하기 위해 나눠서 조회
+            for i in range(0, len(hashes), 500):
+                part = hashes[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model_id = ? AND dimension = ? AND text_hash IN ({','.join('?' * len(part))})",
+                    [self.model_id, self.dimension, *part],
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model_id = ? AND dimension = ? AND text_hash = ?",
+                    [(now, self.model_id, self.dimension, h) for h in found],
+                )
+                self._conn.commit()
+
+            hit_count = sum(1 for h in hashes if h in found)
+            self.hits += hit_count
+            self.misses += len(hashes) - hit_count
+
+        return [
+            np.frombuffer(found[h], dtype=np.float32).tolist() if h in found else None
+            for h in hashes
+        ]
+
+    def put_many(self, texts, vectors):
+        """텍스트-임베딩 쌍 저장 후 용량 초과분 삭제"""
+        now = time.time()
+        rows = [
+            (self.model_id, self.dimension, self.text_hash(text),
+             np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_access LIMIT ?)",
+                (overflow,),
+            )
+
+    def stats(self):
+        """캐시 hit/miss 통계"""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        total = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,115 @@
+"""
+embedding_engine.py
+Bedrock Titan 임베딩 동시 처리 엔진
+
+- 설정한 동시성 한도 내에서 여러 Titan 요청을 병렬 실행
+- ThrottlingException 발생 시 전체 워커가 함께 지수 백오프
+- 입력 순서와 동일한 순서로 결과 반환
+- 처리량 통계 제공
+"""
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from botocore.exceptions import ClientError
+
+
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
+
+
+class ConcurrentEmbedder:
+    """Titan 임베딩 동시 요청 처리기"""
+
+    def __init__(self, client, model_id="amazon.titan-embed-text-v2:0", max_concurrency=16,
+                 max_retries=8, base_delay=0.5, max_delay=20.0, model_kwargs: Optional[dict] = None):
+        self.client = client
+        self.model_id = model_id
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.model_kwargs = model_kwargs or {}
+
+        # throttle 발생 시 모든 워커가 공유하는 대기 시각
+        self._lock = threading.Lock()
+        self._pause_until = 0.0
+        self.reset_stats()
+
+    def reset_stats(self):
+        """처리량 통계 초기화"""
+        with self._lock:
+            self._texts = 0
+            self._requests = 0
+            self._throttled = 0
+            self._elapsed = 0.0
+
+    def stats(self):
+        """누적 처리량 통계 반환"""
+        with self._lock:
+            return {
+                "texts": self._texts,
+                "requests": self._requests,
+                "throttled": self._throttled,
+                "seconds": round(self._elapsed, 3),
+                "texts_per_sec": round(self._texts / self._elapsed, 2) if self._elapsed else 0.0,
+            }
+
+    def embed_query(self, text) -> List[float]:
+        """단일 텍스트 임베딩 (throttle 시 재시도)"""
+        body = json.dumps({"inputText": text, **self.model_kwargs})
+        for attempt in range(self.max_retries + 1):
+            self._wait_if_paused()
+            try:
+                with self._lock:
+                    self._requests += 1
+                response = self.client.invoke_model(
+                    modelId=self.model_id,
+                    body=body,
+                    accept="application/json",
+                    contentType="application/json",
+                )
+                return json.loads(response["body"].read())["embedding"]
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code")
+                if code not in RETRYABLE_ERROR_CODES or attempt == self.max_retries:
+                    raise
+                self._backoff(attempt)
+
+    def embed_documents(self, texts) -> List[List[float]]:
+        """여러 텍스트를 동시에 임베딩 (입력 순서 유지)"""
+        texts = list(texts)
+        if not texts:
+            return []
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(texts))) as executor:
+            embeddings = list(executor.map(self.embed_query, texts))
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._texts += len(texts)
+            self._elapsed += elapsed
+        print(f"임베딩 {len(texts)}건 완료: {elapsed:.2f}초 ({len(texts) / elapsed:.1f}건/초)")
+        return embeddings
+
+    def _backoff(self, attempt):
+        """지수 백오프 + jitter 후 전체 워커 일시 정지"""
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        with self._lock:
+            self._throttled += 1
+            self._pause_until = max(self._pause_until, time.monotonic() + delay)
+
+    def _wait_if_paused(self):
+        remaining = self._pause_until - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
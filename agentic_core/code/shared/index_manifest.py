@@ -0,0 +1,71 @@
+"""
+index_manifest.py
+증분 색인용 manifest 관리
+
+- chunk_id별 content hash를 JSON 파일로 저장
+- 임시 파일 교체 방식으로 체크포인트를 원자적으로 기록
+- 인덱스 이름 / 임베딩 프로필 / 인덱스 UUID가 바뀌면 (재생성 포함) 전체 재색인
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+class IndexManifest:
+    """색인된 chunk 상태(manifest) 관리"""
+
+    def __init__(self, path, index_name, embedding_profile=None, index_uuid=None):
+        self.path = Path(path)
+        self.index_name = index_name
+        self.embedding_profile = embedding_profile
+        self.index_uuid = index_uuid
+        self.chunks = {}
+
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            mismatched = [
+                f"{key} ({saved.get(key)} != {value})"
+                for key, value in self._identity().items()
+                if saved.get(key) != value
+            ]
+            if not mismatched:
+                self.chunks = saved.get("chunks", {})
+            else:
+                print(f"⚠️ manifest 불일치 {', '.join(mismatched)}, 전체 재색인")
+
+    def _identity(self):
+        """manifest가 유효한 인덱스 식별 정보"""
+        return {
+            "index_name": self.index_name,
+            "embedding_profile": self.embedding_profile,
+            "index_uuid": self.index_uuid
+        }
+
+    @staticmethod
+    def chunk_hash(chunk):
+        """chunk 전체 필드 기준 content hash"""
+        payload = json.dumps(chunk, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, chunk_id):
+        return self.chunks.get(str(chunk_id))
+
+    def set(self, chunk_id, chunk_hash):
+        self.chunks[str(chunk_id)] = chunk_hash
+
+    def remove(self, chunk_id):
+        self.chunks.pop(str(chunk_id), None)
+
+    def ids(self):
+        return set(self.chunks)
+
+    def save(self):
+        """체크포인트 저장 (임시 파일 작성 후 교체)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({**self._identity(), "chunks": self.chunks}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
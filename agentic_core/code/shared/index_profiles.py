@@ -0,0 +1,219 @@
+"""
+index_profiles.py
+임베딩 프로필 및 OpenSearch 인덱스 mapping 생성
+
+- 임베딩 프로필: Titan v2 출력 차원 / 정규화 / 인덱스 저장 인코딩 (float, fp16, byte)
+- ANN 인덱스 preset: engine, HNSW m / ef_construction / ef_search
+- 프로필과 preset에 맞는 knn_vector mapping 생성 (벡터는 _source에 저장하지 않음)
+- 프로필별 recall vs 인덱스 크기 비교 리포트
+"""
+
+import numpy as np
+
+
+EMBEDDING_FIELDS = ["content_embedding", "summary_embedding", "expected_question_embedding"]
+
+EMBEDDING_PROFILES = {
+    "float-1024": {"dimension": 1024, "normalize": True, "encoding": "float"},
+    "fp16-1024": {"dimension": 1024, "normalize": True, "encoding": "fp16"},
+    "float-512": {"dimension": 512, "normalize": True, "encoding": "float"},
+    "fp16-512": {"dimension": 512, "normalize": True, "encoding": "fp16"},
+    "byte-512": {"dimension": 512, "normalize": True, "encoding": "byte"},
+    "fp16-256": {"dimension": 256, "normalize": True, "encoding": "fp16"},
+    "byte-256": {"dimension": 256, "normalize": True, "encoding": "byte"},
+}
+
+# HNSW preset (ef_search는 인덱스 기본값, 검색 요청마다 override 가능)
+INDEX_PRESETS = {
+    "balanced": {"engine": "faiss", "m": 16, "ef_construction": 256, "ef_search": 100},
+    "low-latency": {"engine": "faiss", "m": 16, "ef_construction": 128, "ef_search": 40},
+    "high-recall": {"engine": "faiss", "m": 32, "ef_construction": 512, "ef_search": 256},
+    # float 프로필이면 fp16 scalar quantization까지 적용
+    "low-memory": {"engine": "faiss", "m": 8, "ef_construction": 128, "ef_search": 64, "encoder": "fp16"},
+}
+
+# 인코딩별 차원당 bytes
+ENCODING_BYTES = {"float": 4, "fp16": 2, "byte": 1}
+
+
+def get_profile(name):
+    if name not in EMBEDDING_PROFILES:
+        raise ValueError(f"Unknown embedding profile: {name} (available: {', '.join(EMBEDDING_PROFILES)})")
+    return {"name": name, **EMBEDDING_PROFILES[name]}
+
+
+def get_preset(name):
+    if name not in INDEX_PRESETS:
+        raise ValueError(f"Unknown index preset: {name} (available: {', '.join(INDEX_PRESETS)})")
+    return {"name": name, **INDEX_PRESETS[name]}
+
+
+def embedding_model_kwargs(profile):
+    """Titan v2 요청 body 파라미터"""
+    return {"dimensions": profile["dimension"], "normalize": profile["normalize"]}
+
+
+def byte_scale(dimension):
+    """byte 양자화 배율: 정규화 벡터 성분 표준편차(1/√d)의 4배를 ±127로 매핑"""
+    return 127 / (4 / np.sqrt(dimension))
+
+
+def encode_vector(vector, profile):
+    """인덱스 저장 인코딩에 맞게 벡터 변환 (byte는 int8 범위 정수로 양자화)"""
+    if profile["encoding"] != "byte":
+        return vector
+    scaled = np.round(np.asarray(vector, dtype=np.float32) * byte_scale(profile["dimension"]))
+    return np.clip(scaled, -128, 127).astype(int).tolist()
+
+
+def knn_field_mapping(profile, preset):
+    """프로필 / preset에 맞는 knn_vector 필드 mapping
+
+    fp16 인코딩은 faiss scalar quantization, byte 인코딩은 lucene byte vector가 필요하므로
+    인코딩이 preset의 engine보다 우선합니다.
+    """
+    field = {"type": "knn_vector", "dimension": profile["dimension"]}
+    parameters = {"m": preset["m"], "ef_construction": preset["ef_construction"]}
+    engine = preset["engine"]
+    encoding = profile["encoding"]
+    if encoding == "float" and preset.get("encoder") == "fp16":
+        encoding = "fp16"
+
+    if encoding == "fp16":
+        engine = "faiss"
+        parameters["encoder"] = {"name": "sq", "parameters": {"type": "fp16"}}
+    elif encoding == "byte":
+        engine = "lucene"
+        field["data_type"] = "byte"
+
+    # faiss HNSW는 검색 기본 ef를 method parameters에서 읽음 (index 설정 knn.algo_param.ef_search는 nmslib용)
+    if engine == "faiss":
+        parameters["ef_search"] = preset["ef_search"]
+
+    field["method"] = {
+        "name": "hnsw",
+        "engine": engine,
+        "space_type": "l2",
+        "parameters": parameters
+    }
+    return field
+
+
+def build_index_mapping(profile_name="float-1024", preset_name="balanced"):
+    """aws-document-chunks 인덱스 mapping 생성"""
+    profile = get_profile(profile_name)
+    preset = get_preset(preset_name)
+    return {
+        "mappings": {
+            "_meta": {
+                "embedding_profile": profile,
+                "index_preset": preset
+            },
+            # 벡터는 knn 인덱스에만 저장하고 _source에서는 제외
+            "_source": {
+                "excludes": EMBEDDING_FIELDS
+            },
+            "properties": {
+                "chunk_id": {
+                    "type": "integer"
+                },
+                "parent_chunk_id": {
+                    "type": "integer"
+                },
+                "start_char_idx": {
+                    "type": "integer"
+                },
+                "end_char_idx": {
+                    "type": "integer"
+                },
+                "content": {
+                    "type": "text",
+                    "analyzer": "nori_analyzer"
+                },
+                "content_embedding": knn_field_mapping(profile, preset),
+                "summary": {
+                    "type": "text",
+                    "analyzer": "nori_analyzer"
+                },
+                "summary_embedding": knn_field_mapping(profile, preset),
+                "expected_question": {
+                    "type": "text",
+                    "analyzer": "nori_analyzer"
+                },
+                "expected_question_embedding": knn_field_mapping(profile, preset),
+                "keywords": {
+                    "type": "keyword"
+                }
+            }
+        },
+        "settings": {
+            "index": {
+                "knn": True,
+                "knn.algo_param.ef_search": preset["ef_search"],
+                "number_of_shards": 3,
+                "number_of_replicas": 2
+            },
+            "analysis": {
+                "analyzer": {
+                    "nori_analyzer": {
+                        "tokenizer": "nori_tokenizer",
+                        "filter": ["nori_stop", "lowercase"]
+                    }
+                },
+                "filter": {
+                    "nori_stop": {
+                        "type": "nori_part_of_speech",
+                        "stoptags": ["J", "JKS", "JKB", "JKO", "JKG", "JKC", "JKV", "JKQ", "JX", "JC"]
+                    }
+                }
+            }
+        }
+    }
+
+
+def estimate_index_bytes(num_vectors, profile, m=16):
+    """HNSW 인덱스 메모리 추정: 1.1 * (bytes_per_dim * dimension + 8 * m) * num_vectors"""
+    return int(1.1 * (ENCODING_BYTES[profile["encoding"]] * profile["dimension"] + 8 * m) * num_vectors)
+
+
+def recall_size_report(processor, chunks, profile_names=None, k=10, max_queries=200, m=16):
+    """프로필별 recall@k 및 인덱스 크기 비교
+
+    chunk content를 문서, 각 chunk의 첫 번째 expected_question을 질의로 사용하고
+    float-1024 프로필의 exact top-k를 정답으로 recall을 계산합니다.
+    """
+    chunks = list(chunks)
+    profile_names = profile_names or list(EMBEDDING_PROFILES)
+    documents = [chunk["content"] for chunk in chunks]
+    queries = [chunk["expected_questions"][0] for chunk in chunks if chunk.get("expected_questions")][:max_queries]
+
+    def top_k(profile_name):
+        profile = get_profile(profile_name)
+        doc_vectors = _simulate_encoding(processor.get_embeddings_with_profile(documents, profile_name), profile)
+        query_vectors = _simulate_encoding(processor.get_embeddings_with_profile(queries, profile_name), profile)
+        scores = query_vectors @ doc_vectors.T
+        return np.argsort(-scores, axis=1)[:, :k]
+
+    baseline = top_k("float-1024")
+    report = []
+    for name in profile_names:
+        profile = get_profile(name)
+        result = baseline if name == "float-1024" else top_k(name)
+        recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(baseline, result)])
+        size = estimate_index_bytes(len(documents) * len(EMBEDDING_FIELDS), profile, m)
+        report.append({"profile": name, f"recall@{k}": round(float(recall), 4), "index_mb": round(size / 1024 ** 2, 2)})
+
+    print(f"{'profile':<12} {'recall@' + str(k):>10} {'index_mb':>10}")
+    for row in report:
+        print(f"{row['profile']:<12} {row[f'recall@{k}']:>10} {row['index_mb']:>10}")
+    return report
+
+
+def _simulate_encoding(vectors, profile):
+    """저장 인코딩의 정밀도 손실을 로컬에서 재현"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if profile["encoding"] == "fp16":
+        return vectors.astype(np.float16).astype(np.float32)
+    if profile["encoding"] == "byte":
+        return np.asarray([encode_vector(v, profile) for v in vectors], dtype=np.float32)
+    return vectors
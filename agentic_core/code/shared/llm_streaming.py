@@ -0,0 +1,47 @@
+"""
+llm_streaming.py
+LLM 응답 텍스트 스트리밍
+
+- astream_text: ChatModel.astream을 직접 구동 (token마다 runnable별 callback / event 객체를 만들지 않음)
+- astream_events_text: 기존 astream_events 경로 (on_chat_model_stream만 사용, 비교 / 호환용)
+- 두 경로 모두 텍스트 delta(str)만 반환하므로 엔트리포인트의 {"type": "stream"} payload는 동일
+
+Runtime 배포 시 runtime_utils.bundle_shared_modules()가 엔트리포인트 디렉터리로 복사합니다.
+"""
+
+
+def chunk_text(chunk):
+    """AIMessageChunk에서 텍스트 추출 (Claude content block 목록 포함)"""
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for content_item in content:
+            if isinstance(content_item, dict):
+                parts.append(content_item.get("text") or "")
+            elif isinstance(content_item, str):
+                parts.append(content_item)
+        return "".join(parts)
+    return ""
+
+
+async def astream_text(llm, prompt_value, config=None, usage=None):
+    """LLM을 직접 스트리밍하여 텍스트 delta 반환
+
+    usage dict를 전달하면 chunk의 usage_metadata(input / output / total tokens)를 합산합니다.
+    """
+    async for chunk in llm.astream(prompt_value, config=config):
+        if usage is not None and getattr(chunk, "usage_metadata", None):
+            for key in ("input_tokens", "output_tokens", "total_tokens"):
+                usage[key] = usage.get(key, 0) + chunk.usage_metadata.get(key, 0)
+        if text := chunk_text(chunk):
+            yield text
+
+
+async def astream_events_text(chain, chain_input, config=None):
+    """chain.astream_events에서 LLM 스트림 텍스트 delta만 반환"""
+    async for event in chain.astream_events(chain_input, config=config):
+        if event["event"] == "on_chat_model_stream":
+            if text := chunk_text(event["data"]["chunk"]):
+                yield text
@@ -0,0 +1,187 @@
+"""
+mcp_session_pool.py
+MCP 서버 URL별 장기 ClientSession 풀
+
+- transport 연결 + initialize + list_tools를 요청 경로 밖(세션 전용 task)에서 한 번만 수행
+- 세션별 동시 요청 수 제한 (asyncio.Semaphore)
+- 일정 시간 사용하지 않은 세션은 임대 전 / background에서 ping으로 상태 확인, 실패 시 재연결
+- 연결 오류로 끝난 요청의 세션은 폐기하고 다음 요청에서 다시 연결
+
+anyio 기반 transport / ClientSession context는 들어간 task에서 나와야 하므로 세션마다 전용 task가 context를 유지합니다.
+Runtime 배포 시 runtime_utils.bundle_shared_modules()가 엔트리포인트 디렉터리로 복사합니다.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import anyio
+import httpx
+from mcp import ClientSession
+
+
+# 세션을 폐기하고 재연결해야 하는 연결 계열 오류
+CONNECTION_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    httpx.TransportError,
+    ConnectionError,
+    asyncio.TimeoutError,
+)
+
+
+class PooledMcpSession:
+    """전용 task가 유지하는 MCP ClientSession 하나"""
+
+    def __init__(self, url, transport_factory, max_concurrency):
+        self.url = url
+        self.session = None
+        self.tools = []
+        self.error = None
+        self.last_ok = 0.0
+        self.active = 0
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self._transport_factory = transport_factory
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task = None
+
+    @property
+    def alive(self):
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def connect(self, timeout):
+        """세션 task 시작 후 initialize 완료까지 대기"""
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise
+        if self.session is None:
+            raise self.error or ConnectionError(f"MCP 세션 연결 실패: {self.url}")
+
+    async def _run(self):
+        try:
+            async with self._transport_factory(self.url) as (read_stream, write_stream, _):
+                async with ClientSession(read_stream, write_stream) as session:
+                    await session.initialize()
+                    mcp_tools = await session.list_tools()
+                    self.tools = mcp_tools.tools if hasattr(mcp_tools, 'tools') else mcp_tools
+                    self.session = session
+                    self.last_ok = time.monotonic()
+                    self._ready.set()
+                    await self._stop.wait()
+        except Exception as e:
+            self.error = e
+            print(f"⚠️ MCP 세션 종료: {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def ping(self, timeout):
+        """ping 응답 여부 확인"""
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            self.last_ok = time.monotonic()
+            return True
+        except Exception as e:
+            print(f"⚠️ MCP 세션 ping 실패: {e}")
+            return False
+
+    async def close(self):
+        self._stop.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), 5)
+            except Exception:
+                self._task.cancel()
+        self.session = None
+
+
+class McpSessionPool:
+    """URL별 장기 MCP 세션 풀"""
+
+    def __init__(self, transport_factory, max_concurrency=8, health_check_interval=30,
+                 connect_timeout=30, ping_timeout=5):
+        """
+        Args:
+            transport_factory: url → (read_stream, write_stream, get_session_id)를 내주는 async context manager
+            max_concurrency: 세션 하나에서 동시에 처리할 요청 수
+            health_check_interval: 이 시간(초) 이상 사용하지 않은 세션은 ping으로 확인
+        """
+        self.transport_factory = transport_factory
+        self.max_concurrency = max_concurrency
+        self.health_check_interval = health_check_interval
+        self.connect_timeout = connect_timeout
+        self.ping_timeout = ping_timeout
+        self._sessions = {}
+        self._locks = {}
+        self._health_task = None
+
+    async def _get(self, url):
+        """살아 있는 세션 반환 (없거나 ping 실패 시 재연결)"""
+        lock = self._locks.setdefault(url, asyncio.Lock())
+        async with lock:
+            pooled = self._sessions.get(url)
+            if pooled is not None and pooled.alive and pooled.active == 0 \
+                    and time.monotonic() - pooled.last_ok >= self.health_check_interval:
+                if not await pooled.ping(self.ping_timeout):
+                    await pooled.close()
+            if pooled is None or not pooled.alive:
+                pooled = PooledMcpSession(url, self.transport_factory, self.max_concurrency)
+                await pooled.connect(self.connect_timeout)
+                self._sessions[url] = pooled
+                print(f"✅ MCP 세션 연결: {url}")
+            self._start_health_check()
+            return pooled
+
+    @asynccontextmanager
+    async def session(self, url):
+        """세션 임대 (동시 요청 수 제한, 연결 오류 시 세션 폐기)"""
+        pooled = await self._get(url)
+        async with pooled.semaphore:
+            pooled.active += 1
+            try:
+                yield pooled
+                pooled.last_ok = time.monotonic()
+            except CONNECTION_ERRORS:
+                await self.discard(url, pooled)
+                raise
+            finally:
+                pooled.active -= 1
+
+    async def discard(self, url, pooled=None):
+        """세션 폐기 (다음 요청에서 다시 연결)"""
+        current = self._sessions.get(url)
+        if current is not None and (pooled is None or current is pooled):
+            del self._sessions[url]
+            await current.close()
+
+    def _start_health_check(self):
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _health_loop(self):
+        """유휴 세션을 주기적으로 ping, 실패한 세션은 폐기"""
+        while self._sessions:
+            await asyncio.sleep(self.health_check_interval)
+            for url, pooled in list(self._sessions.items()):
+                async with self._locks[url]:
+                    if pooled.active or time.monotonic() - pooled.last_ok < self.health_check_interval:
+                        continue
+                    if not pooled.alive or not await pooled.ping(self.ping_timeout):
+                        await self.discard(url, pooled)
+
+    async def aclose(self):
+        for url in list(self._sessions):
+            await self.discard(url)
+        if self._health_task is not None:
+            self._health_task.cancel()
+
+    def stats(self):
+        return {
+            url: {"alive": pooled.alive, "active": pooled.active, "tools": len(pooled.tools)}
+            for url, pooled in self._sessions.items()
+        }
@@ -1,6 +1,7 @@
 import json
 import boto3
 import requests
+from botocore.config import Config
 import asyncio
 import numpy as np
 from typing import List, Dict, Any, Optional
@@ -8,15 +9,22 @@ from datetime import datetime
 from langchain_aws import BedrockEmbeddings
 from requests.auth import HTTPBasicAuth
 from pathlib import Path
-from opensearchpy import OpenSearch, RequestsHttpConnection
+from opensearchpy import OpenSearch, RequestsHttpConnection, helpers
+from embedding_engine import ConcurrentEmbedder
+from embedding_cache import EmbeddingCache
+from index_manifest import IndexManifest
+from index_profiles import get_profile, embedding_model_kwargs, encode_vector
 
 class OpenSearchEmbeddingProcessor:
     """OpenSearch 임베딩 처리 및 저장 클래스"""
     
-    def __init__(self, region = 'us-west-2' ):
+    def __init__(self, region = 'us-west-2', max_concurrency=16, cache_path=None, cache_max_entries=200_000,
+                 embedding_profile="float-1024" ):
         # AWS region
         self.region = region
         self.service = 'es'
+        # 임베딩 프로필 (차원 / 정규화 / 저장 인코딩)
+        self.profile = get_profile(embedding_profile)
         
         # AWS credential
         self.session = boto3.Session()
@@ -33,6 +41,11 @@ class OpenSearchEmbeddingProcessor:
         
         # embedding
         self.embeddings = self._setup_embeddings()
+        self.embedder = self._setup_embedder(max_concurrency)
+        # 로컬 임베딩 캐시 (cache_path 지정 시 사용)
+        self.embedding_cache = None
+        if cache_path:
+            self.enable_embedding_cache(cache_path, cache_max_entries)
         self.os_client = OpenSearch(
                             hosts=[{'host': self.host, 'port': 443}],
                             http_auth=(self.username, self.password),
@@ -51,12 +64,41 @@ class OpenSearchEmbeddingProcessor:
                     service_name='bedrock-runtime',
                     region_name=self.region
                 ),
-                model_id="amazon.titan-embed-text-v2:0"
+                model_id="amazon.titan-embed-text-v2:0",
+                model_kwargs=embedding_model_kwargs(self.profile)
             )
         except Exception as e:
             print(f"❌ 임베딩 모델 초기화 실패: {e}")
             return None
 
+    def _setup_embedder(self, max_concurrency):
+        """Titan 동시 임베딩 엔진 설정"""
+        if not self.embeddings:
+            return None
+        # 동시 요청 수만큼 connection pool 확보, throttling 재시도는 엔진의 공용 backoff만 사용
+        client = boto3.client(
+            service_name='bedrock-runtime',
+            region_name=self.region,
+            config=Config(max_pool_connections=max_concurrency, retries={"max_attempts": 1, "mode": "standard"})
+        )
+        return ConcurrentEmbedder(
+            client=client,
+            model_id=self.embeddings.model_id,
+            max_concurrency=max_concurrency,
+            model_kwargs=embedding_model_kwargs(self.profile)
+        )
+
+    def enable_embedding_cache(self, cache_path, max_entries=200_000):
+        """디스크 임베딩 캐시 활성화 (model_id, dimension, 텍스트 hash 기준)"""
+        self.embedding_cache = EmbeddingCache(
+            path=cache_path,
+            model_id="amazon.titan-embed-text-v2:0",
+            dimension=self.profile["dimension"],
+            max_entries=max_entries
+        )
+        print(f"✅ 임베딩 캐시 사용: {cache_path}")
+        return self.embedding_cache
+
     def create_index(self, index_name, index_mapping):  
         self.index_name = index_name
         if self.os_client.indices.exists(index=index_name):
@@ -85,6 +127,175 @@ class OpenSearchEmbeddingProcessor:
         except Exception as e:
             print(f"Error indexing document {pk}: {e}")
 
+    def bulk_save_data(self, documents, chunk_size=500, max_chunk_bytes=10 * 1024 * 1024,
+                       thread_count=4, disable_refresh=True):
+        """_bulk API를 사용한 배치 병렬 색인
+
+        Args:
+            documents: (pk, document) 튜플의 iterable (generator 사용 가능)
+            chunk_size: 배치당 최대 문서 수
+            max_chunk_bytes: 배치당 최대 요청 크기 (bytes)
+            thread_count: 동시에 전송할 배치 수
+            disable_refresh: 색인 중 refresh 비활성화 여부
+
+        Returns:
+            dict: {"success": 성공 건수, "errors": 문서별 에러 목록}
+        """
+        actions = (
+            {"_index": self.index_name, "_id": self._doc_id(pk), "_source": document}
+            for pk, document in documents
+        )
+        result = self._run_bulk(actions, chunk_size, max_chunk_bytes, thread_count, disable_refresh)
+        self._bump_index_version()
+        return result
+
+    def _doc_id(self, pk):
+        return f"aws_doc_{pk}"
+
+    def _run_bulk(self, actions, chunk_size=500, max_chunk_bytes=10 * 1024 * 1024,
+                  thread_count=4, disable_refresh=True, on_success=None):
+        """bulk action 실행 후 결과 집계 (on_success(op_type, doc_id) 콜백 지원)"""
+        refresh_interval = self._disable_refresh() if disable_refresh else None
+        success, errors = 0, []
+        try:
+            for ok, item in helpers.parallel_bulk(
+                self.os_client,
+                actions,
+                thread_count=thread_count,
+                chunk_size=chunk_size,
+                max_chunk_bytes=max_chunk_bytes,
+                queue_size=thread_count,
+                raise_on_error=False,
+                raise_on_exception=False,
+            ):
+                op_type, info = next(iter(item.items()))
+                # 이미 없는 문서의 삭제는 성공으로 처리
+                if ok or (op_type == "delete" and info.get("status") == 404):
+                    success += 1
+                    if on_success:
+                        on_success(op_type, info.get("_id"))
+                    if success % 500 == 0:
+                        print(f"{success} documents processed")
+                else:
+                    errors.append({
+                        "id": info.get("_id"),
+                        "op_type": op_type,
+                        "status": info.get("status"),
+                        "error": info.get("error") or info.get("exception"),
+                    })
+        finally:
+            if disable_refresh:
+                self._restore_refresh(refresh_interval)
+
+        print(f"✅ Bulk 처리 완료: 성공 {success}건, 실패 {len(errors)}건")
+        return {"success": success, "errors": errors}
+
+    def sync_index(self, chunks, manifest_path, batch_size=64, chunk_size=500, thread_count=4):
+        """manifest 기반 증분 색인
+
+        변경/신규 chunk만 임베딩 후 upsert하고, 원본에서 사라진 chunk는 삭제합니다.
+        성공한 문서는 chunk_size건마다 manifest에 체크포인트되므로
+        중단된 실행을 다시 호출하면 남은 chunk부터 이어서 처리합니다.
+        """
+        manifest = IndexManifest(manifest_path, self.index_name,
+                                 embedding_profile=self.profile["name"], index_uuid=self._index_uuid())
+        seen, pending = set(), {}
+        stats = {"unchanged": 0, "upserted": 0, "deleted": 0}
+
+        def changed_chunks():
+            for chunk in chunks:
+                chunk_id = str(chunk["chunk_id"])
+                seen.add(chunk_id)
+                chunk_hash = manifest.chunk_hash(chunk)
+                if manifest.get(chunk_id) == chunk_hash:
+                    stats["unchanged"] += 1
+                    continue
+                pending[self._doc_id(chunk_id)] = (chunk_id, chunk_hash)
+                yield chunk
+
+        def checkpoint(op_type, doc_id):
+            chunk_id, chunk_hash = pending.pop(doc_id)
+            if op_type == "delete":
+                manifest.remove(chunk_id)
+                stats["deleted"] += 1
+            else:
+                manifest.set(chunk_id, chunk_hash)
+                stats["upserted"] += 1
+            if (stats["upserted"] + stats["deleted"]) % chunk_size == 0:
+                manifest.save()
+
+        refresh_interval = self._disable_refresh()
+        try:
+            # 1) 변경/신규 chunk upsert
+            actions = (
+                {"_index": self.index_name, "_id": self._doc_id(pk), "_source": document}
+                for pk, document in self.build_documents(changed_chunks(), batch_size)
+            )
+            upsert_result = self._run_bulk(actions, chunk_size, thread_count=thread_count,
+                                           disable_refresh=False, on_success=checkpoint)
+            manifest.save()
+
+            # 2) 원본에서 삭제된 chunk 제거
+            removed = manifest.ids() - seen
+            for chunk_id in removed:
+                pending[self._doc_id(chunk_id)] = (chunk_id, None)
+            actions = (
+                {"_op_type": "delete", "_index": self.index_name, "_id": self._doc_id(chunk_id)}
+                for chunk_id in removed
+            )
+            delete_result = self._run_bulk(actions, chunk_size, thread_count=thread_count,
+                                           disable_refresh=False, on_success=checkpoint)
+        finally:
+            manifest.save()
+            self._restore_refresh(refresh_interval)
+            self._bump_index_version()
+
+        stats["errors"] = upsert_result["errors"] + delete_result["errors"]
+        print(f"✅ 증분 색인 완료: 변경 없음 {stats['unchanged']}건, upsert {stats['upserted']}건, "
+              f"삭제 {stats['deleted']}건, 실패 {len(stats['errors'])}건")
+        return stats
+
+    def _index_uuid(self):
+        """인덱스 UUID (삭제 후 재생성하면 바뀜)"""
+        settings = self.os_client.indices.get_settings(index=self.index_name, name="index.uuid")
+        return settings[self.index_name]["settings"]["index"]["uuid"]
+
+    def _disable_refresh(self):
+        """색인 중 refresh 비활성화 후 기존 refresh_interval 반환"""
+        settings = self.os_client.indices.get_settings(
+            index=self.index_name, name="index.refresh_interval"
+        )
+        refresh_interval = (
+            settings.get(self.index_name, {})
+            .get("settings", {})
+            .get("index", {})
+            .get("refresh_interval")
+        )
+        self.os_client.indices.put_settings(
+            index=self.index_name, body={"index": {"refresh_interval": "-1"}}
+        )
+        return refresh_interval
+
+    def _restore_refresh(self, refresh_interval):
+        """refresh_interval 복원 (None이면 기본값) 후 refresh 실행"""
+        try:
+            self.os_client.indices.put_settings(
+                index=self.index_name, body={"index": {"refresh_interval": refresh_interval}}
+            )
+            self.os_client.indices.refresh(index=self.index_name)
+        except Exception as e:
+            print(f"❌ refresh 설정 복원 실패: {e}")
+
+    def _bump_index_version(self):
+        """색인 변경 후 mapping _meta.index_version 갱신 (Runtime 답변 캐시 무효화용)"""
+        try:
+            mapping = self.os_client.indices.get_mapping(index=self.index_name)
+            meta = mapping.get(self.index_name, {}).get("mappings", {}).get("_meta", {})
+            meta["index_version"] = datetime.now().isoformat()
+            self.os_client.indices.put_mapping(index=self.index_name, body={"_meta": meta})
+        except Exception as e:
+            print(f"❌ 인덱스 버전 갱신 실패: {e}")
+
     def get_data_path(self):
         current_dir = Path.cwd()
         data_path = current_dir.parent.parent.parent.parent / "data" / "raw" / "basic_aws_dictionary.json"
@@ -94,26 +305,146 @@ class OpenSearchEmbeddingProcessor:
         with open(path, 'r', encoding='utf-8') as f:
             return json.load(f)
 
+    def iter_json_chunks(self, path, key="char_chunks", buffer_size=1 << 20):
+        """최상위 객체의 key 배열 항목을 하나씩 yield하는 streaming reader
+
+        파일 전체를 json.load 하지 않으므로 메모리 사용량이 코퍼스 크기와 무관하고,
+        첫 chunk를 읽는 즉시 임베딩/색인 pipeline이 시작됩니다.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            reader = _JsonStreamReader(f, buffer_size)
+            reader.expect("{")
+            while True:
+                if reader.peek() == "}":
+                    return
+                name = reader.decode()
+                reader.expect(":")
+                if name == key:
+                    yield from reader.iter_array()
+                    return
+                reader.decode()  # 다른 최상위 값은 건너뜀
+                if reader.peek() == ",":
+                    reader.expect(",")
+
+    def index_json_file(self, path, batch_size=64, chunk_size=100, thread_count=4):
+        """streaming read → 동시 임베딩 → _bulk 색인 pipeline"""
+        chunks = self.iter_json_chunks(path)
+        return self.bulk_save_data(
+            self.build_documents(chunks, batch_size),
+            chunk_size=chunk_size,
+            thread_count=thread_count
+        )
+
     def get_embedding(self, text):
         """BedrockEmbeddings를 사용한 임베딩 생성"""
         if not self.embeddings:
             self.embeddings = self._setup_embeddings()
+
+        if self.embedding_cache:
+            cached = self.embedding_cache.get_many([text])[0]
+            if cached is not None:
+                return cached
+            vector = self.embeddings.embed_query(text)
+            self.embedding_cache.put_many([text], [vector])
+            return vector
         
         return self.embeddings.embed_query(text)
 
     def get_embedding_with_key(self, data , key):
         """BedrockEmbeddings를 사용한 임베딩 생성"""
-        if not self.embeddings:
-            self.embeddings = self._setup_embeddings()
-        
-        return self.embeddings.embed_query(data[key])
+        return self.get_embedding(data[key])
     
     def get_embeddings_batch(self, texts):
-        """여러 텍스트의 임베딩을 배치로 생성"""
-        if not self.embeddings:
+        """여러 텍스트의 임베딩을 동시 요청으로 생성 (입력 순서 유지)"""
+        if not self.embedder:
             self.embeddings = self._setup_embeddings()
-        
-        return self.embeddings.embed_documents(texts)
+            self.embedder = self._setup_embedder(16)
+
+        return self._cached_embed(texts, self.embedder, self.embedding_cache)
+
+    def get_embeddings_with_profile(self, texts, profile_name):
+        """다른 임베딩 프로필(차원/정규화)로 임베딩 생성 (프로필 비교용)"""
+        profile = get_profile(profile_name)
+        if (profile["dimension"], profile["normalize"]) == (self.profile["dimension"], self.profile["normalize"]):
+            return self.get_embeddings_batch(texts)
+
+        embedder = ConcurrentEmbedder(
+            client=self.embedder.client,
+            model_id=self.embeddings.model_id,
+            max_concurrency=self.embedder.max_concurrency,
+            model_kwargs=embedding_model_kwargs(profile)
+        )
+        cache = None
+        if self.embedding_cache:
+            cache = EmbeddingCache(
+                path=self.embedding_cache.path,
+                model_id=self.embedding_cache.model_id,
+                dimension=profile["dimension"],
+                max_entries=self.embedding_cache.max_entries
+            )
+        return self._cached_embed(texts, embedder, cache)
+
+    def _cached_embed(self, texts, embedder, cache):
+        if not cache:
+            return embedder.embed_documents(texts)
+
+        # 캐시에 없는 텍스트만 Bedrock 호출 (중복 텍스트는 한 번만)
+        texts = list(texts)
+        vectors = cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            new_texts = list(dict.fromkeys(texts[i] for i in missing))
+            new_vectors = embedder.embed_documents(new_texts)
+            cache.put_many(new_texts, new_vectors)
+            lookup = dict(zip(new_texts, new_vectors))
+            for i in missing:
+                vectors[i] = lookup[texts[i]]
+        return vectors
+
+    def build_documents(self, chunks, batch_size=64):
+        """chunk를 색인용 document로 변환하는 generator
+
+        batch_size개 chunk의 content/summary/expected_question을 한 번에 동시 임베딩하고
+        (chunk_id, document) 튜플을 순서대로 반환합니다.
+        """
+        batch = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                yield from self._build_document_batch(batch)
+                batch = []
+        if batch:
+            yield from self._build_document_batch(batch)
+
+    def _build_document_batch(self, batch):
+        texts = []
+        for chunk in batch:
+            texts.extend([
+                chunk["content"],
+                chunk["summary"],
+                ",".join(chunk["expected_questions"])
+            ])
+        vectors = self.get_embeddings_batch(texts)
+
+        for i, chunk in enumerate(batch):
+            content_embedding, summary_embedding, expected_question_embedding = (
+                encode_vector(vector, self.profile) for vector in vectors[i * 3:i * 3 + 3]
+            )
+            document = {
+                "chunk_id": chunk["chunk_id"],
+                "parent_chunk_id": chunk["parent_chunk_id"],
+                # 원문 내 위치 (Runtime에서 overlap 구간 병합에 사용)
+                "start_char_idx": chunk.get("start_char_idx"),
+                "end_char_idx": chunk.get("end_char_idx"),
+                "content": chunk["content"],
+                "content_embedding": content_embedding,
+                "summary": chunk["summary"],
+                "summary_embedding": summary_embedding,
+                "expected_question": ",".join(chunk["expected_questions"]),
+                "expected_question_embedding": expected_question_embedding,
+                "keywords": chunk["keywords"]
+            }
+            yield chunk["chunk_id"], document
 
     def check_data_property(self, data):
         print("data -> ", data[0])
@@ -145,4 +476,68 @@ class OpenSearchEmbeddingProcessor:
         except Exception as e:
             print(f"❌ 연결 오류: {e}")
             return False
-    
\ No newline at end of file
+
+
+class _JsonStreamReader:
+    """버퍼 단위로 파일을 읽으며 JSON 값을 순차 decode"""
+
+    def __init__(self, f, buffer_size):
+        self.f = f
+        self.buffer_size = buffer_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.pos > len(self.buf) // 2:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        data = self.f.read(self.buffer_size)
+        if not data:
+            self.eof = True
+        self.buf += data
+
+    def peek(self):
+        """공백을 건너뛴 다음 문자 반환"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                raise ValueError("Unexpected end of JSON file")
+            self._fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos}, got '{self.buf[self.pos]}'")
+        self.pos += 1
+
+    def decode(self):
+        """다음 JSON 값 하나를 decode (버퍼 경계에서 잘린 경우 추가로 읽음)"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # 숫자 등이 버퍼 끝에서 잘렸을 수 있으므로 뒤에 문자가 있을 때만 확정
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def iter_array(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.decode()
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("]")
+                return
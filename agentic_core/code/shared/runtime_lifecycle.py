@@ -0,0 +1,121 @@
+"""
+runtime_lifecycle.py
+AgentCore Runtime 초기화 lifecycle
+
+- LazyInit: 동시 요청에서도 정확히 한 번만 실행되는 lazy 초기화 (실패 시 다음 요청에서 재시도)
+- RuntimeLifecycle: 앱 시작 시 background thread에서 리소스 생성 및 warmup hook 실행
+- readiness: 리소스별 준비 상태 및 초기화 소요 시간
+
+Runtime 배포 시 runtime_utils.bundle_shared_modules()가 엔트리포인트 디렉터리로 복사합니다.
+"""
+
+import asyncio
+import threading
+import time
+
+
+class LazyInit:
+    """한 번만 실행되는 thread-safe lazy 초기화"""
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.value = None
+        self.init_seconds = None
+        self.error = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+    def get(self):
+        """초기화된 객체 반환 (진행 중인 초기화가 있으면 완료까지 대기)"""
+        if self.value is None:
+            with self._lock:
+                if self.value is None:
+                    start = time.perf_counter()
+                    try:
+                        self.value = self.factory()
+                        self.error = None
+                    except Exception as e:
+                        self.error = str(e)
+                        raise
+                    finally:
+                        self.init_seconds = round(time.perf_counter() - start, 3)
+                    print(f"✅ {self.name} 초기화 완료 ({self.init_seconds}s)")
+        return self.value
+
+    async def aget(self):
+        """get()의 asyncio 버전 (초기화 대기 중에도 event loop를 막지 않음)"""
+        if self.value is not None:
+            return self.value
+        return await asyncio.to_thread(self.get)
+
+
+class RuntimeLifecycle:
+    """리소스 등록 / 시작 시 warmup / readiness 관리"""
+
+    def __init__(self):
+        self.resources = {}
+        self.hooks = []
+        self.warmup_seconds = None
+        self._warmup_thread = None
+
+    def resource(self, name, factory):
+        """lazy 리소스 등록"""
+        self.resources[name] = LazyInit(name, factory)
+        return self.resources[name]
+
+    def on_warmup(self, hook):
+        """리소스 생성 후 실행할 warmup 함수 등록 (connection 미리 열기 등)"""
+        self.hooks.append(hook)
+        return hook
+
+    def warmup(self, background=True):
+        """등록된 리소스 생성 및 warmup hook 실행
+
+        background=True면 thread에서 실행하여 서버 시작을 막지 않습니다.
+        warmup 도중 들어온 요청은 같은 LazyInit을 기다리므로 중복 초기화가 없습니다.
+        """
+        if background:
+            self._warmup_thread = threading.Thread(target=self._run_warmup, name="runtime-warmup", daemon=True)
+            self._warmup_thread.start()
+        else:
+            self._run_warmup()
+
+    @property
+    def ready(self):
+        return all(resource.ready for resource in self.resources.values())
+
+    @property
+    def warming(self):
+        """background warmup 진행 중 여부"""
+        return self._warmup_thread is not None and self._warmup_thread.is_alive()
+
+    def readiness(self):
+        """리소스별 준비 상태"""
+        return {
+            "ready": self.ready,
+            "warming": self.warming,
+            "warmup_seconds": self.warmup_seconds,
+            "resources": {
+                name: {"ready": resource.ready, "init_seconds": resource.init_seconds, "error": resource.error}
+                for name, resource in self.resources.items()
+            },
+        }
+
+    def _run_warmup(self):
+        start = time.perf_counter()
+        for resource in self.resources.values():
+            try:
+                resource.get()
+            except Exception as e:
+                print(f"❌ {resource.name} 초기화 실패 (첫 요청에서 재시도): {e}")
+        for hook in self.hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"⚠️ warmup 실패: {e}")
+        self.warmup_seconds = round(time.perf_counter() - start, 3)
+        print(f"✅ Runtime warmup 완료 ({self.warmup_seconds}s)")
@@ -5,11 +5,19 @@ AgentCore Runtime 관련 공통 유틸리티 함수들
 이 모듈은 AWS Bedrock AgentCore Runtime 배포에 필요한 함수들을 제공합니다.
 - Runtime용 IAM 역할 생성
 - MCP Server Runtime 생성 및 관리
+- Runtime 엔트리포인트 디렉터리로 공용 모듈 복사
 """
 
 import boto3
 import json
+import shutil
 import time
+from pathlib import Path
+
+
+# Runtime 컨테이너에 함께 배포할 공용 모듈
+RUNTIME_SHARED_MODULES = ["client_registry.py", "config_cache.py", "runtime_lifecycle.py", "llm_streaming.py",
+                          "stream_emitter.py", "mcp_session_pool.py", "index_profiles.py"]
 
 
 def create_agentcore_runtime_role(agent_name, region):
@@ -231,4 +239,29 @@ def create_agentcore_runtime_role(agent_name, region):
     except Exception as e:
         print(f"⚠️ 정책 연결 오류: {e}")
 
-    return agentcore_iam_role
\ No newline at end of file
+    return agentcore_iam_role
+
+
+def bundle_shared_modules(target_dir, modules=RUNTIME_SHARED_MODULES):
+    """
+    공용 모듈을 Runtime 엔트리포인트 디렉터리로 복사
+
+    starter toolkit은 엔트리포인트 디렉터리만 컨테이너로 빌드하므로
+    runtime.configure() 전에 호출해야 합니다.
+
+    Args:
+        target_dir (str | Path): 엔트리포인트 디렉터리
+        modules (list): shared 디렉터리 기준 모듈 파일명 목록
+
+    Returns:
+        list: 복사된 파일 경로 목록
+    """
+    shared_dir = Path(__file__).resolve().parent
+    target_dir = Path(target_dir)
+    copied = []
+    for module in modules:
+        target = target_dir / module
+        shutil.copy2(shared_dir / module, target)
+        copied.append(target)
+    print(f"✅ 공용 모듈 복사 완료: {', '.join(modules)} → {target_dir}")
+    return copied
@@ -0,0 +1,119 @@
+"""
+stream_benchmark.py
+스트리밍 경로 벤치마크: direct (LLM.astream) vs events (chain.astream_events)
+
+- overhead: fake chat model로 모델 지연을 제거하고 token당 CPU 시간 측정
+- bedrock: 실제 ChatBedrock으로 time-to-first-token / 전체 시간 측정
+
+사용법:
+    python stream_benchmark.py                      # overhead만 측정
+    python stream_benchmark.py --bedrock            # Bedrock TTFT 포함
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from llm_streaming import astream_text, astream_events_text
+
+
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a helpful assistant."),
+    ("human", "{question}")
+])
+
+
+async def _run(mode, llm, question):
+    """한 번 스트리밍하여 (time-to-first-token, 전체 시간, CPU 시간, token 수) 반환"""
+    chain = PROMPT | llm | StrOutputParser()
+    start, cpu_start = time.perf_counter(), time.process_time()
+    first_token_at, tokens = None, 0
+    if mode == "events":
+        deltas = astream_events_text(chain, {"question": question})
+    else:
+        deltas = astream_text(llm, await PROMPT.ainvoke({"question": question}))
+    async for _ in deltas:
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+        tokens += 1
+    end = time.perf_counter()
+    return {
+        "ttft_ms": (first_token_at - start) * 1000 if first_token_at else None,
+        "total_ms": (end - start) * 1000,
+        "cpu_ms": (time.process_time() - cpu_start) * 1000,
+        "tokens": tokens,
+    }
+
+
+def _fake_llm(num_tokens):
+    # GenericFakeChatModel은 공백 단위로 나누어 token처럼 스트리밍
+    text = " ".join(f"tok{i}" for i in range(num_tokens))
+    return GenericFakeChatModel(messages=iter([AIMessage(content=text)] * 1000))
+
+
+def _summary(results):
+    tokens = results[0]["tokens"]
+    cpu = statistics.median(r["cpu_ms"] for r in results)
+    ttft = [r["ttft_ms"] for r in results if r["ttft_ms"] is not None]
+    return {
+        "tokens": tokens,
+        "cpu_ms": round(cpu, 2),
+        "cpu_us_per_token": round(cpu * 1000 / max(tokens, 1), 2),
+        "ttft_ms": round(statistics.median(ttft), 2) if ttft else None,
+        "total_ms": round(statistics.median(r["total_ms"] for r in results), 2),
+    }
+
+
+async def benchmark_overhead(num_tokens=2000, repeats=5):
+    """fake model 기준 경로별 token당 CPU overhead"""
+    report = {}
+    for mode in ("events", "direct"):
+        llm = _fake_llm(num_tokens)
+        await _run(mode, llm, "warmup")
+        report[mode] = _summary([await _run(mode, llm, "benchmark") for _ in range(repeats)])
+    return report
+
+
+async def benchmark_bedrock(question="AWS Lambda를 한 문단으로 설명해줘", repeats=3,
+                            model_id="global.anthropic.claude-sonnet-4-20250514-v1:0"):
+    """실제 Bedrock 모델 기준 경로별 TTFT / 전체 시간"""
+    from langchain_aws import ChatBedrock
+    from client_registry import ClientRegistry
+
+    registry = ClientRegistry()
+    llm = ChatBedrock(
+        client=registry.client('bedrock-runtime'),
+        model_id=model_id,
+        model_kwargs={"max_tokens": 500, "temperature": 0.15}
+    )
+    report = {}
+    for mode in ("events", "direct"):
+        await _run(mode, llm, "hi")
+        report[mode] = _summary([await _run(mode, llm, question) for _ in range(repeats)])
+    return report
+
+
+def print_report(title, report):
+    print(f"== {title}")
+    print(f"{'mode':<8} {'tokens':>7} {'cpu_ms':>9} {'us/token':>9} {'ttft_ms':>9} {'total_ms':>9}")
+    for mode, row in report.items():
+        print(f"{mode:<8} {row['tokens']:>7} {row['cpu_ms']:>9} {row['cpu_us_per_token']:>9} "
+              f"{str(row['ttft_ms']):>9} {row['total_ms']:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--bedrock", action="store_true")
+    args = parser.parse_args()
+
+    print_report("overhead (fake model)", asyncio.run(benchmark_overhead(args.tokens, args.repeats)))
+    if args.bedrock:
+        print_report("bedrock", asyncio.run(benchmark_bedrock(repeats=args.repeats)))
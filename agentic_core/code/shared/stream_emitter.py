@@ -0,0 +1,138 @@
+"""
+stream_emitter.py
+스트리밍 응답 frame 병합
+
+- 모델 delta를 바로 yield하지 않고 크기(bytes) 또는 flush 간격 기준으로 하나의 stream frame으로 병합
+- 첫 frame은 즉시 내보내 time-to-first-token 유지
+- 모델이 멈춰도(tool 실행 등) 버퍼에 남은 텍스트는 flush 간격 안에 전송
+- final 이벤트는 전체 텍스트 또는 메타데이터(길이, frame / delta 수, token usage, sha256)만 전달
+
+Runtime 배포 시 runtime_utils.bundle_shared_modules()가 엔트리포인트 디렉터리로 복사합니다.
+"""
+
+import asyncio
+import hashlib
+import time
+
+
+class StreamEmitter:
+    """delta → stream frame 병합기"""
+
+    def __init__(self, max_bytes=512, flush_interval=0.05, final_content=True):
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.final_content = final_content
+        self.deltas = 0
+        self.frames_sent = 0
+        self._parts = []
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._last_flush = time.monotonic()
+
+    @property
+    def text(self):
+        """지금까지 받은 전체 텍스트"""
+        return "".join(self._parts)
+
+    def push(self, text):
+        """delta 추가, frame을 내보낼 시점이면 stream 이벤트 반환 (아니면 None)"""
+        self.deltas += 1
+        self._parts.append(text)
+        self._buffer.append(text)
+        self._buffer_bytes += len(text.encode("utf-8"))
+        if (self.frames_sent == 0 or self._buffer_bytes >= self.max_bytes
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            return self.flush()
+        return None
+
+    def flush(self):
+        """버퍼에 남은 텍스트를 stream 이벤트로 반환 (비어 있으면 None)"""
+        if not self._buffer:
+            return None
+        frame = {"type": "stream", "content": "".join(self._buffer)}
+        self._buffer, self._buffer_bytes = [], 0
+        self._last_flush = time.monotonic()
+        self.frames_sent += 1
+        return frame
+
+    def emit(self, text):
+        """완성된 텍스트(캐시된 답변 등)를 한 frame으로 반환"""
+        self.deltas += 1
+        self._parts.append(text)
+        self._buffer.append(text)
+        return self.flush()
+
+    async def frames(self, deltas):
+        """텍스트 delta async iterator를 병합된 stream 이벤트로 변환
+
+        다음 delta를 기다리는 동안 flush 간격이 지나면 버퍼를 바로 내보냅니다.
+        대기 중인 __anext__는 취소하지 않고 계속 기다립니다 (취소하면 모델 스트림이 종료됨).
+        """
+        iterator = deltas.__aiter__()
+        pending = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(iterator.__anext__())
+                timeout = None
+                if self._buffer:
+                    timeout = max(0.0, self.flush_interval - (time.monotonic() - self._last_flush))
+                done, _ = await asyncio.wait({pending}, timeout=timeout)
+                if not done:
+                    if frame := self.flush():
+                        yield frame
+                    continue
+                task, pending = pending, None
+                try:
+                    text = task.result()
+                except StopAsyncIteration:
+                    break
+                if frame := self.push(text):
+                    yield frame
+        finally:
+            if pending is not None:
+                pending.cancel()
+        if frame := self.flush():
+            yield frame
+
+    def final(self, usage=None, **metadata):
+        """final 이벤트 (final_content=False면 텍스트 대신 메타데이터만 전달)"""
+        text = self.text
+        if self.final_content:
+            return {"type": "final", "content": text, **metadata}
+        event = {
+            "type": "final",
+            "length": len(text),
+            "frames": self.frames_sent,
+            "deltas": self.deltas,
+            "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            **metadata
+        }
+        if usage:
+            event["usage"] = usage
+        return event
+
+
+if __name__ == "__main__":
+    # 동작 확인: python stream_emitter.py
+    emitter = StreamEmitter()
+    assert emitter.emit("cached answer") == {"type": "stream", "content": "cached answer"}
+    assert emitter.final() == {"type": "final", "content": "cached answer"}
+
+    emitter = StreamEmitter(final_content=False)
+    frame = emitter.emit("cached answer")
+    assert frame == {"type": "stream", "content": "cached answer"}
+    assert emitter.final()["length"] == len("cached answer")
+
+    async def _deltas():
+        for text in ["a", "b", "c"]:
+            yield text
+
+    async def _collect():
+        emitter = StreamEmitter(flush_interval=10)
+        frames = [frame async for frame in emitter.frames(_deltas())]
+        assert "".join(frame["content"] for frame in frames) == "abc"
+        return frames
+
+    print(asyncio.run(_collect()))
+    print("✅ StreamEmitter 확인 완료")